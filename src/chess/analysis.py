@@ -0,0 +1,114 @@
+"""Background engine analysis in a process pool shared by all sessions.
+
+Callers submit a board under a session id and poll for the result by
+position hash, so a page never waits on the search. Each session has at
+most one job per purpose: submitting a new position cancels the stale job
+if it has not started yet, and a running one finishes within its time
+budget and is then ignored.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+from .board import Board
+from .book import BOOK_PATH, OpeningBook
+from .engine import Engine, SearchResult
+
+
+class Analysis(NamedTuple):
+    key: int
+    result: SearchResult
+
+
+# One engine per worker process, so its transposition table is reused
+_engine: Optional[Engine] = None
+
+
+def _analyse(snapshot: bytes, key: int, time_limit: float, max_depth: int,
+             use_book: bool) -> Analysis:
+    global _engine
+    if _engine is None:
+        _engine = Engine(book=OpeningBook(BOOK_PATH))
+    board = Board.from_snapshot(snapshot)
+    return Analysis(key, _engine.search(board, time_limit, max_depth, use_book))
+
+
+class AnalysisService:
+    def __init__(self, workers: int = 2, max_pending: int = 16, max_jobs: int = 1024) -> None:
+        # Spawned workers: forking the multi-threaded Streamlit server is unsafe
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.lock = threading.Lock()
+        # (session id, purpose) -> (position hash, future)
+        self.jobs: Dict[Tuple[str, str], Tuple[int, Future]] = {}
+        # Futures of ``search`` calls, until they finish
+        self.searches: Set[Future] = set()
+        self.rejected = 0
+
+    def search(self, board: Board, time_limit: float, max_depth: int,
+               use_book: bool = True) -> "Optional[Future[Analysis]]":
+        """Search ``board`` in the pool without session bookkeeping; None if
+        the queue is full."""
+        with self.lock:
+            if self.pending() >= self.max_pending:
+                self.rejected += 1
+                return None
+            future = self.executor.submit(_analyse, board.snapshot(), board.hash, time_limit,
+                                          max_depth, use_book)
+            self.searches.add(future)
+        future.add_done_callback(self.searches.discard)
+        return future
+
+    def pending(self) -> int:
+        return (sum(1 for _, future in self.jobs.values() if not future.done())
+                + sum(1 for future in list(self.searches) if not future.done()))
+
+    def submit(self, session_id: str, board: Board, time_limit: float, max_depth: int,
+               purpose: str = "hint") -> bool:
+        """Queue analysis of ``board``; False if the queue is full."""
+        job_id = (session_id, purpose)
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                if job[0] == board.hash:
+                    return True
+                job[1].cancel()
+                del self.jobs[job_id]
+            if self.pending() >= self.max_pending:
+                self.rejected += 1
+                return False
+            # Hints want an evaluation, so only the computer's moves use the book
+            future = self.executor.submit(_analyse, board.snapshot(), board.hash, time_limit,
+                                          max_depth, purpose == "move")
+            self.jobs[job_id] = (board.hash, future)
+            if len(self.jobs) > self.max_jobs:
+                self._prune()
+            return True
+
+    def _prune(self) -> None:
+        # Forget the oldest finished jobs, e.g. from sessions that went away
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs // 2:
+                break
+            if self.jobs[job_id][1].done():
+                del self.jobs[job_id]
+
+    def poll(self, session_id: str, key: int, purpose: str = "hint") -> Optional[SearchResult]:
+        """The finished result for position ``key``, if there is one yet."""
+        job = self.jobs.get((session_id, purpose))
+        if job is None or job[0] != key:
+            return None
+        future = job[1]
+        if not future.done() or future.cancelled() or future.exception() is not None:
+            return None
+        return future.result().result
+
+    def cancel(self, session_id: str) -> None:
+        with self.lock:
+            for job_id in [job_id for job_id in self.jobs if job_id[0] == session_id]:
+                self.jobs.pop(job_id)[1].cancel()
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
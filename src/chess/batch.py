@@ -0,0 +1,278 @@
+"""Vectorized evaluation of many positions at once with NumPy.
+
+A ``PositionBatch`` holds N positions as an (N, 64) array of the piece
+codes ``Board.squares`` uses, plus side to move, castling rights, en
+passant square and clocks. It converts to and from Boards, 38-byte
+snapshots, (N, 12, 64) piece planes and (N, 12) uint64 bitboards, and
+scores every position with array operations.
+
+Attack maps and mobility work on the uint64 bitboards a whole column at a
+time: a knight jump, king step or ray step is a shift plus a mask that
+drops squares wrapped around the board's edge. Rays of one side's sliders
+never overlap in a single direction, so per-piece mobility sums are
+per-direction popcounts.
+
+Run from ``src`` to compare with evaluating one Board at a time::
+
+    python -m chess.batch --sizes 1000,10000,100000,1000000
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from .bitboard import (BISHOP_DIRECTIONS, KING_OFFSETS, KNIGHT_OFFSETS, ROOK_DIRECTIONS,
+                       PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, BLACK)
+from .board import Board, SNAPSHOT
+from .evaluation import PIECE_VALUES, SQUARE_SCORES, evaluate, material, mobility
+from .movegen import attacked_squares, decode_move, legal_moves
+
+# Rows per chunk for the per-square table lookups
+CHUNK = 32_768
+SNAPSHOT_DTYPE = np.dtype([("squares", "u1", 32), ("flags", "u1"), ("en_passant", "u1"),
+                           ("halfmove", "<u2"), ("fullmove", "<u2")])
+assert SNAPSHOT_DTYPE.itemsize == SNAPSHOT.size
+
+# Per piece code (0 = empty): signed piece value, and value plus table
+MATERIAL = np.array([0] + PIECE_VALUES + [-value for value in PIECE_VALUES], dtype=np.int32)
+SCORES = np.array([[0] * 64] + SQUARE_SCORES, dtype=np.int32)
+SQUARE_INDEX = np.arange(64)
+PIECE_WEIGHTS = MATERIAL[1:].astype(np.int64)
+
+
+class _Step(NamedTuple):
+    amount: np.uint64
+    left: bool
+    # Files a shifted square may land on without having wrapped
+    mask: np.uint64
+
+
+def _step(dx: int, dy: int) -> _Step:
+    delta = dx * 8 + dy
+    files = [col for col in range(8) if 0 <= col - dy < 8]
+    mask = sum(1 << (row * 8 + col) for row in range(8) for col in files)
+    return _Step(np.uint64(abs(delta)), delta > 0, np.uint64(mask))
+
+
+KNIGHT_STEPS = [_step(dx, dy) for dx, dy in KNIGHT_OFFSETS]
+KING_STEPS = [_step(dx, dy) for dx, dy in KING_OFFSETS]
+# White pawns capture towards row 0
+PAWN_STEPS = [[_step(-1, -1), _step(-1, 1)], [_step(1, -1), _step(1, 1)]]
+ROOK_STEPS = [_step(dx, dy) for dx, dy in ROOK_DIRECTIONS]
+BISHOP_STEPS = [_step(dx, dy) for dx, dy in BISHOP_DIRECTIONS]
+
+
+def _shift(bb: np.ndarray, step: _Step) -> np.ndarray:
+    return ((bb << step.amount) if step.left else (bb >> step.amount)) & step.mask
+
+
+if hasattr(np, "bitwise_count"):
+    popcount = np.bitwise_count
+else:
+    def popcount(bb: np.ndarray) -> np.ndarray:
+        # NumPy before 2.0: SWAR bit count
+        bb = bb - ((bb >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        bb = (bb & np.uint64(0x3333333333333333)) + ((bb >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        bb = (bb + (bb >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return (bb * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def _attacks_and_mobility(bitboards: np.ndarray, color: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Attack bitboards and mobility counts of ``color`` for (N, 12) bitboards."""
+    pieces = bitboards[:, color * 6:color * 6 + 6]
+    own = np.bitwise_or.reduce(pieces, axis=1)
+    empty = ~(own | np.bitwise_or.reduce(bitboards[:, (color ^ 1) * 6:(color ^ 1) * 6 + 6], axis=1))
+    free = ~own
+    attacks = np.zeros(len(bitboards), dtype=np.uint64)
+    mobility = np.zeros(len(bitboards), dtype=np.int32)
+    for step in PAWN_STEPS[color]:
+        attacks |= _shift(pieces[:, PAWN], step)
+    # Jumps and rays from distinct squares in one direction never land on
+    # the same square, so each direction's popcount is a per-piece sum
+    for steps, movers in ((KNIGHT_STEPS, pieces[:, KNIGHT]), (KING_STEPS, pieces[:, KING]),
+                          (ROOK_STEPS, pieces[:, ROOK] | pieces[:, QUEEN]),
+                          (BISHOP_STEPS, pieces[:, BISHOP] | pieces[:, QUEEN])):
+        sliding = steps is ROOK_STEPS or steps is BISHOP_STEPS
+        for step in steps:
+            reached = _shift(movers, step)
+            if sliding:
+                ray = reached
+                for _ in range(6):
+                    ray = _shift(ray & empty, step)
+                    reached |= ray
+            attacks |= reached
+            mobility += popcount(reached & free)
+    return attacks, mobility
+
+
+class PositionBatch:
+    def __init__(self, squares: np.ndarray, turn: Optional[np.ndarray] = None,
+                 castling: Optional[np.ndarray] = None, en_passant: Optional[np.ndarray] = None,
+                 halfmove: Optional[np.ndarray] = None, fullmove: Optional[np.ndarray] = None) -> None:
+        n = len(squares)
+        self.squares = np.ascontiguousarray(squares, dtype=np.uint8).reshape(n, 64)
+        self.turn = np.zeros(n, np.uint8) if turn is None else np.asarray(turn, np.uint8)
+        self.castling = np.zeros(n, np.uint8) if castling is None else np.asarray(castling, np.uint8)
+        # 255 for none, as in snapshots
+        self.en_passant = (np.full(n, 255, np.uint8) if en_passant is None
+                           else np.asarray(en_passant, np.uint8))
+        self.halfmove = np.zeros(n, np.uint16) if halfmove is None else np.asarray(halfmove, np.uint16)
+        self.fullmove = np.ones(n, np.uint16) if fullmove is None else np.asarray(fullmove, np.uint16)
+        self._bitboards: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.squares)
+
+    @classmethod
+    def from_boards(cls, boards: Sequence[Board]) -> "PositionBatch":
+        squares = np.frombuffer(b"".join(board.squares for board in boards), dtype=np.uint8)
+        return cls(squares.reshape(len(boards), 64),
+                   np.fromiter((board.turn for board in boards), np.uint8, len(boards)),
+                   np.fromiter((board.castling for board in boards), np.uint8, len(boards)),
+                   np.fromiter((255 if board.en_passant is None else board.en_passant
+                                for board in boards), np.uint8, len(boards)),
+                   np.fromiter((board.halfmove for board in boards), np.uint16, len(boards)),
+                   np.fromiter((board.fullmove for board in boards), np.uint16, len(boards)))
+
+    @classmethod
+    def from_snapshots(cls, data: bytes) -> "PositionBatch":
+        """Positions from concatenated ``Board.snapshot()`` records."""
+        records = np.frombuffer(data, dtype=SNAPSHOT_DTYPE)
+        packed = records["squares"]
+        squares = np.empty((len(records), 64), dtype=np.uint8)
+        squares[:, 0::2] = packed >> 4
+        squares[:, 1::2] = packed & 15
+        return cls(squares, records["flags"] & 1, records["flags"] >> 1, records["en_passant"],
+                   records["halfmove"], records["fullmove"])
+
+    def snapshots(self) -> bytes:
+        records = np.empty(len(self), dtype=SNAPSHOT_DTYPE)
+        records["squares"] = self.squares[:, 0::2] << 4 | self.squares[:, 1::2]
+        records["flags"] = self.turn | self.castling << 1
+        records["en_passant"] = self.en_passant
+        records["halfmove"] = self.halfmove
+        records["fullmove"] = self.fullmove
+        return records.tobytes()
+
+    def board(self, i: int) -> Board:
+        en_passant = int(self.en_passant[i])
+        return Board._from_state(bytearray(self.squares[i].tobytes()), int(self.turn[i]),
+                                 int(self.castling[i]), None if en_passant == 255 else en_passant,
+                                 int(self.halfmove[i]), int(self.fullmove[i]))
+
+    def boards(self) -> Iterator[Board]:
+        for i in range(len(self)):
+            yield self.board(i)
+
+    def planes(self) -> np.ndarray:
+        """(N, 12, 64) booleans, indexed like ``BitboardPosition.pieces``."""
+        return self.squares[:, None, :] == np.arange(1, 13, dtype=np.uint8)[None, :, None]
+
+    def bitboards(self) -> np.ndarray:
+        """(N, 12) uint64 with bit ``sq`` set, as in ``BitboardPosition.pieces``."""
+        if self._bitboards is None:
+            self._bitboards = np.concatenate([
+                np.packbits(self.squares[start:start + CHUNK, None, :]
+                            == np.arange(1, 13, dtype=np.uint8)[None, :, None],
+                            axis=2, bitorder="little").view("<u8").reshape(-1, 12)
+                for start in range(0, max(len(self), 1), CHUNK)])
+        return self._bitboards
+
+    @classmethod
+    def from_bitboards(cls, bitboards: np.ndarray, turn: Optional[np.ndarray] = None) -> "PositionBatch":
+        """Piece placement from (N, 12) bitboards; other state left at defaults."""
+        packed = np.ascontiguousarray(bitboards, dtype="<u8").view(np.uint8)
+        planes = np.unpackbits(packed.reshape(len(bitboards), 12, 8), axis=2, bitorder="little")
+        codes = np.arange(1, 13, dtype=np.uint8)[None, :, None]
+        return cls((planes * codes).max(axis=1), turn)
+
+    def material(self) -> np.ndarray:
+        """(N,) centipawns of material, white's point of view."""
+        return (popcount(self.bitboards()).astype(np.int64) @ PIECE_WEIGHTS).astype(np.int32)
+
+    def evaluate(self) -> np.ndarray:
+        """(N,) material plus piece-square score; matches ``evaluation.evaluate``."""
+        return np.concatenate([SCORES[self.squares[start:start + CHUNK], SQUARE_INDEX].sum(axis=1, dtype=np.int32)
+                               for start in range(0, max(len(self), 1), CHUNK)])
+
+    def piece_square(self) -> np.ndarray:
+        """(N,) piece-square table part of the evaluation."""
+        return self.evaluate() - self.material()
+
+    def attack_maps(self) -> np.ndarray:
+        """(N, 2) uint64 bitboards of attacked squares, white then black."""
+        return np.stack([_attacks_and_mobility(self.bitboards(), color)[0]
+                         for color in (WHITE, BLACK)], axis=1)
+
+    def mobility(self) -> np.ndarray:
+        """(N, 2) mobility counts as in ``evaluation.mobility``, white then black."""
+        return np.stack([_attacks_and_mobility(self.bitboards(), color)[1]
+                         for color in (WHITE, BLACK)], axis=1)
+
+
+def random_positions(count: int, seed: int = 1, max_plies: int = 80) -> List[Board]:
+    """Positions from random games, one per ply played."""
+    rng = random.Random(seed)
+    boards: List[Board] = []
+    while len(boards) < count:
+        board = Board()
+        for _ in range(rng.randrange(1, max_plies)):
+            moves = legal_moves(board.bitboards, board.turn, board.castling, board.en_passant)
+            if not moves:
+                break
+            board.make_move(*decode_move(rng.choice(moves)))
+            boards.append(Board.from_snapshot(board.snapshot()))
+            if len(boards) == count:
+                break
+    return boards
+
+
+def scalar_pass(boards: Sequence[Board]) -> None:
+    for board in boards:
+        bitboards = board.bitboards
+        occupied = bitboards.occupied[WHITE] | bitboards.occupied[BLACK]
+        evaluate(bitboards)
+        material(bitboards)
+        mobility(bitboards, WHITE)
+        mobility(bitboards, BLACK)
+        attacked_squares(bitboards, WHITE, occupied)
+        attacked_squares(bitboards, BLACK, occupied)
+
+
+def batch_pass(batch: PositionBatch) -> None:
+    batch.evaluate()
+    batch.material()
+    bitboards = batch.bitboards()
+    for color in (WHITE, BLACK):
+        _attacks_and_mobility(bitboards, color)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time batch evaluation against one Board at a time.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--distinct", type=int, default=10_000,
+                        help="distinct random positions; larger batches repeat them")
+    parser.add_argument("--scalar-limit", type=int, default=20_000,
+                        help="time the per-Board path on at most this many positions")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    boards = random_positions(min(args.distinct, max(sizes)))
+    base = PositionBatch.from_boards(boards)
+    print("size        per-Board        batch   speedup")
+    for size in sizes:
+        batch = PositionBatch(np.resize(base.squares, (size, 64)))
+        sample = [boards[i % len(boards)] for i in range(min(size, args.scalar_limit))]
+        start = time.perf_counter()
+        scalar_pass(sample)
+        scalar_rate = len(sample) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        batch_pass(batch)
+        batch_rate = size / (time.perf_counter() - start)
+        print(f"{size:>9,} {scalar_rate:>10,.0f}/s {batch_rate:>10,.0f}/s {batch_rate / scalar_rate:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
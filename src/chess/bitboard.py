@@ -0,0 +1,244 @@
+"""64-bit bitboard position backend and precomputed attack tables.
+
+Squares are numbered ``row * 8 + col`` using the same (row, col) layout as
+``Board.grid``: row 0 is black's back rank (rank 8) and col 0 is the a-file.
+"""
+from typing import Iterator, List, Optional, Tuple
+
+WHITE, BLACK = 0, 1
+COLOR_INDEX = {"white": WHITE, "black": BLACK}
+COLOR_NAMES = ("white", "black")
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+# Castling rights bits
+CASTLE_WHITE_KINGSIDE, CASTLE_WHITE_QUEENSIDE = 1, 2
+CASTLE_BLACK_KINGSIDE, CASTLE_BLACK_QUEENSIDE = 4, 8
+CASTLE_ALL = 15
+# Rights kept when a move starts or ends on a square; moving the king or a
+# rook from its corner, or capturing that rook, clears the matching rights
+CASTLING_MASK = [CASTLE_ALL] * 64
+CASTLING_MASK[60] = CASTLE_ALL & ~(CASTLE_WHITE_KINGSIDE | CASTLE_WHITE_QUEENSIDE)
+CASTLING_MASK[63] = CASTLE_ALL & ~CASTLE_WHITE_KINGSIDE
+CASTLING_MASK[56] = CASTLE_ALL & ~CASTLE_WHITE_QUEENSIDE
+CASTLING_MASK[4] = CASTLE_ALL & ~(CASTLE_BLACK_KINGSIDE | CASTLE_BLACK_QUEENSIDE)
+CASTLING_MASK[7] = CASTLE_ALL & ~CASTLE_BLACK_KINGSIDE
+CASTLING_MASK[0] = CASTLE_ALL & ~CASTLE_BLACK_QUEENSIDE
+
+FULL = (1 << 64) - 1
+
+# Ray directions as (row delta, col delta)
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1),
+                (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def square(x: int, y: int) -> int:
+    return x * 8 + y
+
+
+def coords(sq: int) -> Tuple[int, int]:
+    return sq >> 3, sq & 7
+
+
+def lsb(bb: int) -> int:
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb: int) -> int:
+    return bb.bit_length() - 1
+
+
+def iter_bits(bb: int) -> Iterator[int]:
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _offset_table(offsets: List[Tuple[int, int]]) -> List[int]:
+    table: List[int] = []
+    for sq in range(64):
+        x, y = coords(sq)
+        bb = 0
+        for dx, dy in offsets:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 8 and 0 <= ny < 8:
+                bb |= 1 << square(nx, ny)
+        table.append(bb)
+    return table
+
+
+def _ray(sq: int, dx: int, dy: int) -> int:
+    x, y = coords(sq)
+    bb = 0
+    x, y = x + dx, y + dy
+    while 0 <= x < 8 and 0 <= y < 8:
+        bb |= 1 << square(x, y)
+        x, y = x + dx, y + dy
+    return bb
+
+
+KNIGHT_ATTACKS: List[int] = _offset_table(KNIGHT_OFFSETS)
+KING_ATTACKS: List[int] = _offset_table(KING_OFFSETS)
+# Squares attacked by a pawn of the given color standing on a square
+PAWN_ATTACKS: List[List[int]] = [
+    _offset_table([(-1, -1), (-1, 1)]),  # white moves towards row 0
+    _offset_table([(1, -1), (1, 1)]),
+]
+
+# (ray table, positive) per direction; positive rays run towards higher
+# square numbers so their nearest blocker is the lowest set bit
+ROOK_RAYS: List[Tuple[List[int], bool]] = [
+    ([_ray(sq, dx, dy) for sq in range(64)], dx * 8 + dy > 0)
+    for dx, dy in ROOK_DIRECTIONS
+]
+BISHOP_RAYS: List[Tuple[List[int], bool]] = [
+    ([_ray(sq, dx, dy) for sq in range(64)], dx * 8 + dy > 0)
+    for dx, dy in BISHOP_DIRECTIONS
+]
+
+
+def _slider_attacks(rays: List[Tuple[List[int], bool]], sq: int, occupied: int) -> int:
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            blocker = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+            ray ^= table[blocker]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    return _slider_attacks(ROOK_RAYS, sq, occupied)
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    return _slider_attacks(BISHOP_RAYS, sq, occupied)
+
+
+def queen_attacks(sq: int, occupied: int) -> int:
+    return _slider_attacks(ROOK_RAYS, sq, occupied) | _slider_attacks(BISHOP_RAYS, sq, occupied)
+
+
+class BitboardPosition:
+    """Per-color, per-piece-type occupancy for one position.
+
+    ``pieces`` is indexed by ``color * 6 + piece_type``.
+    """
+
+    __slots__ = ("pieces", "occupied")
+
+    def __init__(self) -> None:
+        self.pieces: List[int] = [0] * 12
+        self.occupied: List[int] = [0, 0]
+
+    def copy(self) -> "BitboardPosition":
+        other = BitboardPosition.__new__(BitboardPosition)
+        other.pieces = self.pieces[:]
+        other.occupied = self.occupied[:]
+        return other
+
+    def add(self, sq: int, color: int, piece_type: int) -> None:
+        mask = 1 << sq
+        self.pieces[color * 6 + piece_type] |= mask
+        self.occupied[color] |= mask
+
+    def remove(self, sq: int, color: int, piece_type: int) -> None:
+        mask = ~(1 << sq)
+        self.pieces[color * 6 + piece_type] &= mask
+        self.occupied[color] &= mask
+
+    def piece_at(self, sq: int) -> Optional[Tuple[int, int]]:
+        mask = 1 << sq
+        for color in (WHITE, BLACK):
+            if self.occupied[color] & mask:
+                base = color * 6
+                for piece_type in range(6):
+                    if self.pieces[base + piece_type] & mask:
+                        return color, piece_type
+        return None
+
+    def king_square(self, color: int) -> int:
+        return lsb(self.pieces[color * 6 + KING])
+
+    def is_attacked(self, sq: int, by_color: int) -> bool:
+        pieces = self.pieces
+        base = by_color * 6
+        # A pawn of the defending color on sq attacks exactly the squares
+        # an enemy pawn would attack sq from
+        if PAWN_ATTACKS[by_color ^ 1][sq] & pieces[base + PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & pieces[base + KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & pieces[base + KING]:
+            return True
+        occupied = self.occupied[0] | self.occupied[1]
+        queens = pieces[base + QUEEN]
+        rooks = pieces[base + ROOK] | queens
+        if rooks and rook_attacks(sq, occupied) & rooks:
+            return True
+        bishops = pieces[base + BISHOP] | queens
+        if bishops and bishop_attacks(sq, occupied) & bishops:
+            return True
+        return False
+
+    def in_check(self, color: int) -> bool:
+        kings = self.pieces[color * 6 + KING]
+        if not kings:
+            return False
+        return self.is_attacked(lsb(kings), color ^ 1)
+
+    def targets(self, sq: int, color: int, piece_type: int,
+                en_passant: Optional[int] = None,
+                can_castle_kingside: bool = False,
+                can_castle_queenside: bool = False) -> int:
+        """Pseudo-legal destination squares for the piece on ``sq``."""
+        own = self.occupied[color]
+        occupied = own | self.occupied[color ^ 1]
+        if piece_type == PAWN:
+            return self._pawn_targets(sq, color, occupied, en_passant)
+        if piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[sq] & ~own
+        if piece_type == BISHOP:
+            return bishop_attacks(sq, occupied) & ~own
+        if piece_type == ROOK:
+            return rook_attacks(sq, occupied) & ~own
+        if piece_type == QUEEN:
+            return queen_attacks(sq, occupied) & ~own
+        moves = KING_ATTACKS[sq] & ~own
+        home = 60 if color == WHITE else 4
+        if sq == home:
+            rooks = self.pieces[color * 6 + ROOK]
+            # Kingside: f and g files empty, rook on h-file
+            if can_castle_kingside and rooks & (1 << (home + 3)) and not occupied & (0b11 << (home + 1)):
+                moves |= 1 << (home + 2)
+            # Queenside: b, c and d files empty, rook on a-file
+            if can_castle_queenside and rooks & (1 << (home - 4)) and not occupied & (0b111 << (home - 3)):
+                moves |= 1 << (home - 2)
+        return moves
+
+    def _pawn_targets(self, sq: int, color: int, occupied: int, en_passant: Optional[int]) -> int:
+        moves = 0
+        if color == WHITE:
+            one = sq - 8
+            if one >= 0 and not occupied & (1 << one):
+                moves |= 1 << one
+                if sq >= 48 and not occupied & (1 << (one - 8)):
+                    moves |= 1 << (one - 8)
+        else:
+            one = sq + 8
+            if one < 64 and not occupied & (1 << one):
+                moves |= 1 << one
+                if sq < 16 and not occupied & (1 << (one + 8)):
+                    moves |= 1 << (one + 8)
+        attacks = PAWN_ATTACKS[color][sq]
+        moves |= attacks & self.occupied[color ^ 1]
+        if en_passant is not None and attacks & (1 << en_passant):
+            moves |= 1 << en_passant
+        return moves
@@ -1,73 +1,385 @@
-from typing import List, Optional, Tuple, Union
+import struct
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 from .pieces import King, Queen, Rook, Bishop, Knight, Pawn, Piece
+from .bitboard import (BitboardPosition, PAWN, ROOK, KING,
+                       CASTLE_ALL, CASTLE_WHITE_KINGSIDE, CASTLE_WHITE_QUEENSIDE,
+                       CASTLE_BLACK_KINGSIDE, CASTLE_BLACK_QUEENSIDE, CASTLING_MASK, WHITE, BLACK)
+from .utils import parse_position, format_position
+from . import instrument
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, compute_hash
+
+# Piece classes indexed by bitboard piece type
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+PIECE_TYPES = {cls: index for index, cls in enumerate(PIECE_CLASSES)}
+PROMOTION_CLASSES = {"Q": Queen, "R": Rook, "B": Bishop, "N": Knight}
+FEN_PIECES = {"p": Pawn, "n": Knight, "b": Bishop, "r": Rook, "q": Queen, "k": King}
+FEN_LETTERS = {cls: letter for letter, cls in FEN_PIECES.items()}
+
+# Squares hold piece codes: 0 for empty, else 1 + color * 6 + piece type
+# (one more than the bitboard index). PIECES maps codes to the shared pieces.
+PIECES: Tuple[Optional[Piece], ...] = (None,) + tuple(
+    cls(color) for color in ("white", "black") for cls in PIECE_CLASSES)
+PIECE_CODES: Dict[Piece, int] = {piece: code for code, piece in enumerate(PIECES) if piece}
+SYMBOLS = "." + "".join(piece.symbol() for piece in PIECES[1:])
+FEN_CODES = " PNBRQKpnbrqk"
+WHITE_KING, BLACK_KING = 1 + KING, 7 + KING
+PROMOTION_TYPES = {letter: PIECE_TYPES[cls] for letter, cls in PROMOTION_CLASSES.items()}
+INITIAL_SQUARES = bytes(FEN_CODES.index(char) if char != "." else 0 for char in (
+    "rnbqkbnr" "pppppppp" "........" "........"
+    "........" "........" "PPPPPPPP" "RNBQKBNR"))
+
+# FEN placement <-> squares through C-level translate: digits expand to
+# runs of ".", then every byte maps to its code (255 marks a bad character)
+FEN_EXPAND = str.maketrans({str(n): "." * n for n in range(1, 9)})
+FEN_TO_CODE = bytes(FEN_CODES.index(chr(i)) if chr(i) in FEN_CODES[1:]
+                    else 0 if chr(i) == "." else 255 for i in range(256))
+CODE_TO_FEN = bytes(ord(FEN_CODES[i]) if 0 < i < 13 else ord(".") for i in range(256))
+FEN_RUNS = [("." * n, str(n)) for n in range(8, 0, -1)]
+CASTLING_FEN = ["".join(char for char, right in zip("KQkq", (
+    CASTLE_WHITE_KINGSIDE, CASTLE_WHITE_QUEENSIDE,
+    CASTLE_BLACK_KINGSIDE, CASTLE_BLACK_QUEENSIDE)) if mask & right) or "-" for mask in range(16)]
+
+# Binary snapshot: squares two codes per byte, side to move plus castling
+# rights, en passant square (255 for none), halfmove and fullmove clocks
+SNAPSHOT = struct.Struct("<32sBBHH")
+NIBBLE_PAIRS = [bytes((byte >> 4, byte & 15)) for byte in range(256)]
+
+Move = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+class MoveUndo(NamedTuple):
+    """Everything make_move changed that unmake_move cannot recompute."""
+    from_pos: Tuple[int, int]
+    to_pos: Tuple[int, int]
+    special: Optional[str]
+    piece: int
+    captured: int
+    captured_sq: int
+    castling: int
+    en_passant: Optional[int]
+    halfmove: int
+    last_move: Optional[Move]
+    hash: int
+
+
+class GridView:
+    """Rows of ``Piece`` objects over a board's flat squares.
+
+    Each row is built on access, so it is a snapshot: change the board
+    through ``Board.set_piece`` or ``Board.make_move``.
+    """
+
+    __slots__ = ("squares",)
+
+    def __init__(self, squares: bytearray) -> None:
+        self.squares = squares
+
+    def __len__(self) -> int:
+        return 8
+
+    def __getitem__(self, row: int) -> List[Optional[Piece]]:
+        if not 0 <= row < 8:
+            raise IndexError(row)
+        return [PIECES[code] for code in self.squares[row * 8:row * 8 + 8]]
+
+    def __iter__(self) -> Iterator[List[Optional[Piece]]]:
+        return (self[row] for row in range(8))
 
 
 class Board:
     def __init__(self) -> None:
-        self.grid: List[List[Optional[Piece]]] = self.create_initial_board()
+        # Piece code per square, row * 8 + col
+        self.squares: bytearray = self.create_initial_board()
         self.last_move: Optional[Tuple[Tuple[int, int],
                                                          # For en passant
                                                          Tuple[int, int]]] = None
+        # Bitboard backend used by the rules; squares are kept in sync
+        self.bitboards: BitboardPosition = self.build_bitboards()
+        # King square per color (None if absent), kept current by every move
+        self.kings: List[Optional[int]] = self.locate_kings()
+        # Castling rights also stand in for "king/rook has not moved"
+        self.castling: int = CASTLE_ALL
+        # Square a pawn may capture onto en passant, if any
+        self.en_passant: Optional[int] = None
+        # Side to move in the hashed position; flipped by every move
+        self.turn: int = WHITE
+        # Plies since the last capture or pawn move, and the FEN move number
+        self.halfmove: int = 0
+        self.fullmove: int = 1
+        self.hash: int = compute_hash(self.bitboards, self.turn, self.castling, self.en_passant)
+
+    def create_initial_board(self) -> bytearray:
+        return bytearray(INITIAL_SQUARES)
+
+    @property
+    def grid(self) -> GridView:
+        """8x8 view of the pieces, None for empty."""
+        return GridView(self.squares)
+
+    def piece_at(self, pos: Tuple[int, int]) -> Optional[Piece]:
+        return PIECES[self.squares[pos[0] * 8 + pos[1]]]
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "Board":
+        """Build a board from a FEN string; missing trailing fields take defaults.
 
-    def create_initial_board(self) -> List[List[Optional[Piece]]]:
-        # 8x8 grid, None for empty
-        board: List[List[Optional[Piece]]] = [
-            [None for _ in range(8)] for _ in range(8)]
-        # Place pieces for both sides
-        # White
-        board[7] = [
-            Rook("white"), Knight("white"), Bishop("white"), Queen("white"),
-            King("white"), Bishop("white"), Knight("white"), Rook("white")
-        ]
-        board[6] = [Pawn("white") for _ in range(8)]
-        # Black
-        board[0] = [
-            Rook("black"), Knight("black"), Bishop("black"), Queen("black"),
-            King("black"), Bishop("black"), Knight("black"), Rook("black")
-        ]
-        board[1] = [Pawn("black") for _ in range(8)]
+        ValueError if the string is malformed or the position cannot arise:
+        not one king a side, a pawn on a back rank, or the side not to move
+        in check.
+        """
+        fields = fen.split()
+        if not fields:
+            raise ValueError("Empty FEN")
+        expanded = fields[0].translate(FEN_EXPAND)
+        ranks = expanded.split("/")
+        if len(ranks) != 8 or any(len(rank) != 8 for rank in ranks):
+            raise ValueError(f"Bad FEN placement: {fields[0]!r}")
+        try:
+            squares = bytearray("".join(ranks).encode("ascii").translate(FEN_TO_CODE))
+        except UnicodeEncodeError:
+            squares = bytearray([255])
+        if 255 in squares:
+            raise ValueError(f"Bad FEN placement: {fields[0]!r}")
+        if squares.count(WHITE_KING) != 1 or squares.count(BLACK_KING) != 1:
+            raise ValueError(f"Bad FEN placement, each side needs one king: {fields[0]!r}")
+        back_ranks = squares[:8] + squares[56:]
+        if 1 + PAWN in back_ranks or 7 + PAWN in back_ranks:
+            raise ValueError(f"Bad FEN placement, pawn on the first or last rank: {fields[0]!r}")
+        turn = WHITE
+        if len(fields) > 1:
+            if fields[1] not in ("w", "b"):
+                raise ValueError(f"Bad FEN side to move: {fields[1]!r}")
+            turn = WHITE if fields[1] == "w" else BLACK
+        castling = 0
+        if len(fields) > 2 and fields[2] != "-":
+            for char in fields[2]:
+                index = "KQkq".find(char)
+                if index < 0:
+                    raise ValueError(f"Bad FEN castling rights: {fields[2]!r}")
+                castling |= 1 << index
+        en_passant = None
+        if len(fields) > 3 and fields[3] != "-":
+            target = parse_position(fields[3])
+            if target is None:
+                raise ValueError(f"Bad FEN en passant square: {fields[3]!r}")
+            en_passant = target[0] * 8 + target[1]
+        try:
+            halfmove = int(fields[4]) if len(fields) > 4 else 0
+            fullmove = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            raise ValueError(f"Bad FEN move counters: {' '.join(fields[4:6])!r}") from None
+        board = cls._from_state(squares, turn, castling, en_passant, halfmove, fullmove)
+        if board.in_check(turn ^ 1):
+            raise ValueError(f"Bad FEN, the side not to move is in check: {fen!r}")
         return board
 
-    def move_piece(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int], special: Optional[str] = None) -> None:
+    @classmethod
+    def _from_state(cls, squares: bytearray, turn: int, castling: int,
+                    en_passant: Optional[int], halfmove: int, fullmove: int) -> "Board":
+        instrument.incr("board.clones")
+        board = cls.__new__(cls)
+        board.squares = squares
+        board.last_move = None
+        # One pass fills the bitboards and hashes the pieces
+        bitboards = BitboardPosition()
+        pieces = bitboards.pieces
+        key = SIDE_KEY if turn else 0
+        for sq, code in enumerate(squares):
+            if code:
+                pieces[code - 1] |= 1 << sq
+                key ^= PIECE_KEYS[(code - 1) * 64 + sq]
+        bitboards.occupied[WHITE] = pieces[0] | pieces[1] | pieces[2] | pieces[3] | pieces[4] | pieces[5]
+        bitboards.occupied[BLACK] = pieces[6] | pieces[7] | pieces[8] | pieces[9] | pieces[10] | pieces[11]
+        key ^= CASTLING_KEYS[castling]
+        if en_passant is not None:
+            key ^= EN_PASSANT_KEYS[en_passant & 7]
+        board.bitboards = bitboards
+        board.kings = board.locate_kings()
+        board.castling = castling
+        board.en_passant = en_passant
+        board.turn = turn
+        board.halfmove = halfmove
+        board.fullmove = fullmove
+        board.hash = key
+        return board
+
+    def to_fen(self) -> str:
+        placement = self.squares.translate(CODE_TO_FEN).decode("ascii")
+        placement = "/".join(placement[row:row + 8] for row in range(0, 64, 8))
+        for run, count in FEN_RUNS:
+            placement = placement.replace(run, count)
+        target = self.en_passant_target
+        en_passant = format_position(target) if target else "-"
+        side = "w" if self.turn == WHITE else "b"
+        return (f"{placement} {side} {CASTLING_FEN[self.castling]} {en_passant} "
+                f"{self.halfmove} {self.fullmove}")
+
+    def snapshot(self) -> bytes:
+        """The position in 38 bytes, for shipping between processes."""
+        squares = self.squares
+        packed = bytes(high << 4 | low for high, low in zip(squares[0::2], squares[1::2]))
+        en_passant = 255 if self.en_passant is None else self.en_passant
+        return SNAPSHOT.pack(packed, self.turn | self.castling << 1, en_passant,
+                             self.halfmove, self.fullmove)
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> "Board":
+        if len(data) != SNAPSHOT.size:
+            raise ValueError(f"Snapshot must be {SNAPSHOT.size} bytes, got {len(data)}")
+        packed, flags, en_passant, halfmove, fullmove = SNAPSHOT.unpack(data)
+        squares = bytearray(b"".join(map(NIBBLE_PAIRS.__getitem__, packed)))
+        return cls._from_state(squares, flags & 1, flags >> 1,
+                               None if en_passant == 255 else en_passant, halfmove, fullmove)
+
+    def build_bitboards(self) -> BitboardPosition:
+        bitboards = BitboardPosition()
+        pieces = bitboards.pieces
+        for sq, code in enumerate(self.squares):
+            if code:
+                pieces[code - 1] |= 1 << sq
+        bitboards.occupied[WHITE] = pieces[0] | pieces[1] | pieces[2] | pieces[3] | pieces[4] | pieces[5]
+        bitboards.occupied[BLACK] = pieces[6] | pieces[7] | pieces[8] | pieces[9] | pieces[10] | pieces[11]
+        return bitboards
+
+    def locate_kings(self) -> List[Optional[int]]:
+        kings = self.bitboards.pieces[KING], self.bitboards.pieces[6 + KING]
+        return [bb.bit_length() - 1 if bb else None for bb in kings]
+
+    def is_square_attacked(self, square: int, by_color: int) -> bool:
+        """Whether any ``by_color`` piece attacks ``square`` (row * 8 + col)."""
+        return self.bitboards.is_attacked(square, by_color)
+
+    def in_check(self, color: int) -> bool:
+        king = self.kings[color]
+        return king is not None and self.bitboards.is_attacked(king, color ^ 1)
+
+    @property
+    def castling_rights(self) -> Dict[str, Dict[str, bool]]:
+        # Read-only view of the castling bits
+        return {
+            "white": {"kingside": bool(self.castling & CASTLE_WHITE_KINGSIDE),
+                      "queenside": bool(self.castling & CASTLE_WHITE_QUEENSIDE)},
+            "black": {"kingside": bool(self.castling & CASTLE_BLACK_KINGSIDE),
+                      "queenside": bool(self.castling & CASTLE_BLACK_QUEENSIDE)},
+        }
+
+    @property
+    def en_passant_target(self) -> Optional[Tuple[int, int]]:
+        if self.en_passant is None:
+            return None
+        return self.en_passant >> 3, self.en_passant & 7
+
+    def set_piece(self, pos: Tuple[int, int], piece: Optional[Piece]) -> None:
+        sq = pos[0] * 8 + pos[1]
+        old = self.squares[sq]
+        if old:
+            color, piece_type = divmod(old - 1, 6)
+            self.bitboards.remove(sq, color, piece_type)
+            self.hash ^= PIECE_KEYS[(old - 1) * 64 + sq]
+        code = PIECE_CODES[piece] if piece else 0
+        if code:
+            color, piece_type = divmod(code - 1, 6)
+            self.bitboards.add(sq, color, piece_type)
+            self.hash ^= PIECE_KEYS[(code - 1) * 64 + sq]
+        self.squares[sq] = code
+        if old in (WHITE_KING, BLACK_KING) or code in (WHITE_KING, BLACK_KING):
+            self.kings = self.locate_kings()
+
+    def make_move(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int],
+                  special: Optional[str] = None, promotion: Optional[str] = None) -> MoveUndo:
+        """Play a move in place and return the record that undoes it.
+
+        No legality checks are made; ``promotion`` is one of "Q", "R", "B", "N".
+        """
         fx, fy = from_pos
         tx, ty = to_pos
-        piece = self.grid[fx][fy]
-        # Castling
-        if special == "castle_kingside":
-            self.grid[tx][ty] = piece
-            self.grid[fx][fy] = None
-            # Move rook
-            self.grid[tx][5] = self.grid[tx][7]
-            self.grid[tx][7] = None
-            if self.grid[tx][6] and hasattr(self.grid[tx][6], 'has_moved'):
-                setattr(self.grid[tx][6], 'has_moved', True)
-            if self.grid[tx][5] and hasattr(self.grid[tx][5], 'has_moved'):
-                setattr(self.grid[tx][5], 'has_moved', True)
-        elif special == "castle_queenside":
-            self.grid[tx][ty] = piece
-            self.grid[fx][fy] = None
-            # Move rook
-            self.grid[tx][3] = self.grid[tx][0]
-            self.grid[tx][0] = None
-            if self.grid[tx][2] and hasattr(self.grid[tx][2], 'has_moved'):
-                setattr(self.grid[tx][2], 'has_moved', True)
-            if self.grid[tx][3] and hasattr(self.grid[tx][3], 'has_moved'):
-                setattr(self.grid[tx][3], 'has_moved', True)
-        elif special == "en_passant":
-            self.grid[tx][ty] = piece
-            self.grid[fx][fy] = None
-            # Remove captured pawn
-            self.grid[fx][ty] = None
+        squares = self.squares
+        bitboards = self.bitboards
+        from_sq = fx * 8 + fy
+        to_sq = tx * 8 + ty
+        code = squares[from_sq]
+        color, piece_type = divmod(code - 1, 6)
+        captured_sq = fx * 8 + ty if special == "en_passant" else to_sq
+        captured = squares[captured_sq]
+        undo = MoveUndo(from_pos, to_pos, special, code, captured, captured_sq,
+                        self.castling, self.en_passant, self.halfmove, self.last_move, self.hash)
+
+        key = self.hash ^ SIDE_KEY ^ CASTLING_KEYS[self.castling]
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        if captured:
+            bitboards.remove(captured_sq, color ^ 1, (captured - 1) % 6)
+            key ^= PIECE_KEYS[(captured - 1) * 64 + captured_sq]
+            squares[captured_sq] = 0
+        bitboards.remove(from_sq, color, piece_type)
+        key ^= PIECE_KEYS[(code - 1) * 64 + from_sq]
+        squares[from_sq] = 0
+        placed_type = PROMOTION_TYPES[promotion] if promotion else piece_type
+        placed = 1 + color * 6 + placed_type
+        bitboards.add(to_sq, color, placed_type)
+        key ^= PIECE_KEYS[(placed - 1) * 64 + to_sq]
+        squares[to_sq] = placed
+        if piece_type == KING:
+            self.kings[color] = to_sq
+            if special == "castle_kingside" or special == "castle_queenside":
+                rook_from, rook_to = (7, 5) if special == "castle_kingside" else (0, 3)
+                rook_index = (color * 6 + ROOK) * 64
+                bitboards.remove(tx * 8 + rook_from, color, ROOK)
+                bitboards.add(tx * 8 + rook_to, color, ROOK)
+                key ^= PIECE_KEYS[rook_index + tx * 8 + rook_from] ^ PIECE_KEYS[rook_index + tx * 8 + rook_to]
+                squares[tx * 8 + rook_to] = squares[tx * 8 + rook_from]
+                squares[tx * 8 + rook_from] = 0
+
+        self.castling &= CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq]
+        key ^= CASTLING_KEYS[self.castling]
+        if piece_type == PAWN and abs(tx - fx) == 2:
+            self.en_passant = (from_sq + to_sq) // 2
+            key ^= EN_PASSANT_KEYS[fy]
         else:
-            self.grid[tx][ty] = piece
-            self.grid[fx][fy] = None
-        # Mark as moved
-        if piece and hasattr(piece, "has_moved"):
-            setattr(piece, 'has_moved', True)
+            self.en_passant = None
+        self.halfmove = 0 if captured or piece_type == PAWN else self.halfmove + 1
+        self.fullmove += color
+        self.turn ^= 1
+        self.hash = key
         self.last_move = (from_pos, to_pos)
+        return undo
+
+    def unmake_move(self, undo: MoveUndo) -> None:
+        fx, fy = undo.from_pos
+        tx, ty = undo.to_pos
+        squares = self.squares
+        bitboards = self.bitboards
+        from_sq = fx * 8 + fy
+        to_sq = tx * 8 + ty
+        code = undo.piece
+        color, piece_type = divmod(code - 1, 6)
+        bitboards.remove(to_sq, color, (squares[to_sq] - 1) % 6)
+        squares[to_sq] = 0
+        bitboards.add(from_sq, color, piece_type)
+        squares[from_sq] = code
+        if piece_type == KING:
+            self.kings[color] = from_sq
+            if undo.special == "castle_kingside" or undo.special == "castle_queenside":
+                rook_from, rook_to = (7, 5) if undo.special == "castle_kingside" else (0, 3)
+                bitboards.remove(tx * 8 + rook_to, color, ROOK)
+                bitboards.add(tx * 8 + rook_from, color, ROOK)
+                squares[tx * 8 + rook_from] = squares[tx * 8 + rook_to]
+                squares[tx * 8 + rook_to] = 0
+        captured = undo.captured
+        if captured:
+            bitboards.add(undo.captured_sq, color ^ 1, (captured - 1) % 6)
+            squares[undo.captured_sq] = captured
+        self.castling = undo.castling
+        self.en_passant = undo.en_passant
+        self.halfmove = undo.halfmove
+        self.fullmove -= color
+        self.last_move = undo.last_move
+        self.turn ^= 1
+        self.hash = undo.hash
+
+    def move_piece(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int], special: Optional[str] = None) -> None:
+        self.make_move(from_pos, to_pos, special)
 
     def get_board_symbols(self) -> List[List[str]]:
-        symbols: List[List[str]] = []
-        for row in self.grid:
-            symbols.append([p.symbol() if p else "." for p in row])
-        return symbols
+        symbols = [SYMBOLS[code] for code in self.squares]
+        return [symbols[row:row + 8] for row in range(0, 64, 8)]
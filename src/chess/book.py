@@ -0,0 +1,203 @@
+"""Opening book in this package's own file format, read through mmap.
+
+Each entry is 16 big-endian bytes: position key (u64), move (u16), weight
+(u16) and learn (u32), sorted by key. Moves are encoded as in Polyglot: to
+file, to rank, from file, from rank in 3 bits each, then the promotion
+piece; castling is written as the king taking its own rook.
+
+Keys are this package's Zobrist hashes (``Board.hash``), not Polyglot's
+published random numbers, so Polyglot books cannot be used; build books
+with ``build_book``. The first entry is a header (key 0, learn
+``BOOK_MAGIC``), so a Polyglot file is refused instead of never matching.
+
+Run from ``src``::
+
+    python -m chess.book build games.pgn ../data/book.bin --max-ply 20
+    python -m chess.book probe ../data/book.bin --fen "<fen>"
+"""
+import argparse
+import bisect
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from .board import Board
+from .san import move_to_san
+from .movegen import (legal_moves, decode_move, CASTLE_KINGSIDE, CASTLE_QUEENSIDE,
+                      PROMOTE_KNIGHT)
+
+# Opening book used for the computer's moves (built with python -m chess.book)
+BOOK_PATH = os.environ.get("CHESS_BOOK", "data/book.bin")
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+MAX_WEIGHT = 0xFFFF
+BOOK_MAGIC = int.from_bytes(b"CBK1", "big")
+HEADER = ENTRY.pack(0, 0, 0, BOOK_MAGIC)
+
+
+class BookMove(NamedTuple):
+    move: int
+    weight: int
+
+
+def to_polyglot(move: int) -> int:
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+    flag = move >> 12
+    if flag == CASTLE_KINGSIDE:
+        to_sq = (to_sq & ~7) | 7
+    elif flag == CASTLE_QUEENSIDE:
+        to_sq = to_sq & ~7
+    promotion = flag - PROMOTE_KNIGHT + 1 if flag >= PROMOTE_KNIGHT else 0
+    # Polyglot counts ranks from white's side; our rows start at rank 8
+    return ((to_sq & 7) | (7 - (to_sq >> 3)) << 3 | (from_sq & 7) << 6
+            | (7 - (from_sq >> 3)) << 9 | promotion << 12)
+
+
+def polyglot_moves(moves: Sequence[int]) -> Dict[int, int]:
+    """Map Polyglot moves to the legal ``moves`` they stand for."""
+    table = {to_polyglot(move): move for move in moves}
+    for move in moves:
+        # Some books write castling as the king's two-square step
+        if move >> 12 == CASTLE_KINGSIDE or move >> 12 == CASTLE_QUEENSIDE:
+            table.setdefault(to_polyglot(move & 0xFFF), move)
+    return table
+
+
+class _Keys:
+    def __init__(self, data: mmap.mmap) -> None:
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data) // ENTRY.size
+
+    def __getitem__(self, i: int) -> int:
+        return KEY.unpack_from(self.data, i * ENTRY.size)[0]
+
+
+class OpeningBook:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.data: Optional[mmap.mmap] = None
+        # Why an existing file is not used; the book then acts as empty
+        self.error: Optional[str] = None
+        if os.path.exists(path) and os.path.getsize(path) >= ENTRY.size:
+            with open(path, "rb") as handle:
+                self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.data[:ENTRY.size] != HEADER:
+                self.close()
+                self.error = (f"{path} is not a book built by chess.book "
+                              "(Polyglot books use other position keys)")
+        self.random = random.Random()
+
+    def __len__(self) -> int:
+        return len(self.data) // ENTRY.size - 1 if self.data is not None else 0
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    def entries(self, key: int) -> List[Tuple[int, int]]:
+        """(Polyglot move, weight) pairs stored for ``key``."""
+        if self.data is None:
+            return []
+        keys = _Keys(self.data)
+        i = bisect.bisect_left(keys, key, 1)
+        found = []
+        while i < len(keys):
+            entry_key, move, weight, _ = ENTRY.unpack_from(self.data, i * ENTRY.size)
+            if entry_key != key:
+                break
+            found.append((move, weight))
+            i += 1
+        return found
+
+    def moves(self, board: Board) -> List[BookMove]:
+        """Legal book moves for the side to move, heaviest first."""
+        entries = self.entries(board.hash)
+        if not entries:
+            return []
+        table = polyglot_moves(
+            legal_moves(board.bitboards, board.turn, board.castling, board.en_passant))
+        found = []
+        for entry_move, weight in entries:
+            move = table.get(entry_move)
+            if move is not None and weight:
+                found.append(BookMove(move, weight))
+        found.sort(key=lambda book_move: -book_move.weight)
+        return found
+
+    def choose(self, board: Board) -> Optional[int]:
+        """A book move picked at random in proportion to its weight."""
+        moves = self.moves(board)
+        if not moves:
+            return None
+        return self.random.choices([m.move for m in moves], [m.weight for m in moves])[0]
+
+
+def build_book(pgn_path: str, out_path: str, max_ply: int = 20, min_count: int = 1) -> int:
+    """Write a book of the moves played in the first ``max_ply`` plies; returns the entry count."""
+    # Only the builder reads PGN, so the app does not import it
+    from .gamedb import pgn_games
+    counts: Dict[Tuple[int, int], int] = {}
+    for moves, start in pgn_games(pgn_path):
+        board = Board.from_snapshot(start) if start else Board()
+        for move in moves[:max_ply]:
+            pair = (board.hash, to_polyglot(move))
+            counts[pair] = counts.get(pair, 0) + 1
+            board.make_move(*decode_move(move))
+    entries = sorted((key, move, min(count, MAX_WEIGHT))
+                     for (key, move), count in counts.items() if count >= min_count)
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as handle:
+        handle.write(HEADER)
+        for key, move, weight in entries:
+            handle.write(ENTRY.pack(key, move, weight, 0))
+    os.replace(tmp, out_path)
+    return len(entries)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build and probe opening books.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a book from a PGN file")
+    build.add_argument("pgn")
+    build.add_argument("book")
+    build.add_argument("--max-ply", type=int, default=20)
+    build.add_argument("--min-count", type=int, default=1,
+                       help="drop moves played fewer times than this")
+    probe = commands.add_parser("probe", help="list book moves for a position")
+    probe.add_argument("book")
+    probe.add_argument("--fen", help="position (default: initial position)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        count = build_book(args.pgn, args.book, args.max_ply, args.min_count)
+        print(f"{count} entries written in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    board = Board.from_fen(args.fen) if args.fen else Board()
+    book = OpeningBook(args.book)
+    if book.error:
+        print(book.error, file=sys.stderr)
+        return 1
+    try:
+        start = time.perf_counter()
+        moves = book.moves(board)
+        elapsed = time.perf_counter() - start
+        total = sum(m.weight for m in moves)
+        for move, weight in moves:
+            print(f"{move_to_san(board, move):<8} {weight:>6}  {100 * weight / total:5.1f}%")
+        print(f"{len(moves)} book moves ({elapsed * 1e6:.0f}us lookup)")
+    finally:
+        book.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
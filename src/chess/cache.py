@@ -0,0 +1,86 @@
+"""Bounded LRU cache of derived facts keyed by Zobrist position hash."""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from . import instrument
+
+
+class PositionEntry:
+    """Facts derived from one position; fields are filled in as computed."""
+
+    __slots__ = ("moves", "in_check", "evaluation", "targets")
+
+    def __init__(self, moves: Optional[List[int]] = None, in_check: Optional[bool] = None,
+                 evaluation: Optional[int] = None) -> None:
+        # Encoded legal moves for the side to move; shared, never mutate
+        self.moves = moves
+        self.in_check = in_check
+        self.evaluation = evaluation
+        # Destination squares of ``moves`` by origin square; shared too
+        self.targets: Optional[Dict[int, Tuple[int, ...]]] = None
+
+    @property
+    def status(self) -> Optional[str]:
+        if self.moves is None or self.in_check is None:
+            return None
+        if self.moves:
+            return "check" if self.in_check else "ongoing"
+        return "checkmate" if self.in_check else "stalemate"
+
+
+class TranspositionCache:
+    def __init__(self, capacity: int = 50_000) -> None:
+        self.capacity = capacity
+        self.entries: "OrderedDict[int, PositionEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Sessions, server tasks and load-test threads share one cache
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: int) -> Optional[PositionEntry]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+    def peek(self, key: int) -> Optional[PositionEntry]:
+        """The entry for ``key`` if cached, without counting a lookup or
+        refreshing its place in the LRU order."""
+        return self.entries.get(key)
+
+    def put(self, key: int, entry: PositionEntry) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by every game in the process
+position_cache = TranspositionCache()
+instrument.register_cache("position", position_cache.stats)
@@ -0,0 +1,258 @@
+"""Alpha-beta search engine for computer play.
+
+Negamax with iterative deepening under a hard time budget, a transposition
+table, MVV-LVA/killer/history move ordering and quiescence search.
+"""
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .board import Board
+from .book import OpeningBook
+from .cache import position_cache
+from .evaluation import PIECE_VALUES, evaluate
+from .movegen import (LegalMove, legal_moves, decode_move, EN_PASSANT,
+                      PROMOTE_KNIGHT, PROMOTE_QUEEN)
+
+MATE = 100_000
+INFINITY = 1_000_000
+# Scores beyond this are mates; they are stored relative to the node
+MATE_BOUND = MATE - 1_000
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Search presets offered to players: (max depth, seconds per move)
+STRENGTHS = {"Easy": (2, 0.5), "Medium": (4, 2.0), "Hard": (64, 5.0)}
+
+
+class SearchResult(NamedTuple):
+    move: Optional[LegalMove]
+    score: int
+    depth: int
+    nodes: int
+    seconds: float
+    pv: List[LegalMove]
+    # Played from the opening book without searching
+    book: bool = False
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+class _Timeout(Exception):
+    pass
+
+
+class Engine:
+    def __init__(self, time_limit: float = 2.0, max_depth: int = 64,
+                 table_size: int = 200_000, book: Optional[OpeningBook] = None) -> None:
+        self.time_limit = time_limit
+        self.book = book
+        self.max_depth = max_depth
+        self.table_size = table_size
+        # hash -> (depth, score, flag, encoded best move)
+        self.table: Dict[int, Tuple[int, int, int, int]] = {}
+        self.killers: List[List[int]] = []
+        self.history: Dict[int, int] = {}
+        self.nodes = 0
+        self.deadline = 0.0
+
+    def search(self, board: Board, time_limit: Optional[float] = None,
+               max_depth: Optional[int] = None, use_book: bool = True) -> SearchResult:
+        """Best move for the side to move on ``board``; the board is left unchanged.
+
+        A book move, when there is one, is returned without searching.
+        """
+        time_limit = self.time_limit if time_limit is None else time_limit
+        max_depth = self.max_depth if max_depth is None else max_depth
+        start = time.perf_counter()
+        self.deadline = start + time_limit
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(max_depth + 128)]
+        self.history = {}
+        if len(self.table) > self.table_size:
+            self.table.clear()
+
+        moves = legal_moves(board.bitboards, board.turn, board.castling, board.en_passant)
+        if not moves:
+            in_check = board.in_check(board.turn)
+            return SearchResult(None, -MATE if in_check else 0, 0, 0, 0.0, [])
+        if use_book and self.book is not None:
+            book_move = self.book.choose(board)
+            if book_move is not None:
+                decoded = decode_move(book_move)
+                return SearchResult(decoded, 0, 0, 0, time.perf_counter() - start, [decoded], True)
+        best_move, best_score, completed = moves[0], 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self._negamax(board, depth, -INFINITY, INFINITY, 0)
+            except _Timeout:
+                break
+            entry = self.table.get(board.hash)
+            if entry and entry[3]:
+                best_move, best_score, completed = entry[3], score, depth
+            # A deeper iteration costs several times this one; don't start
+            # what cannot finish, and stop once a forced mate is found
+            elapsed = time.perf_counter() - start
+            if elapsed > time_limit / 2 or abs(score) > MATE_BOUND:
+                break
+
+        seconds = time.perf_counter() - start
+        # Only annotates an entry the game already made; not a lookup
+        cached = position_cache.peek(board.hash)
+        if cached is not None:
+            cached.evaluation = best_score
+        return SearchResult(decode_move(best_move), best_score, completed, self.nodes,
+                            seconds, self._principal_variation(board, best_move, completed))
+
+    def _principal_variation(self, board: Board, first: int, depth: int) -> List[LegalMove]:
+        pv: List[LegalMove] = []
+        undos = []
+        move = first
+        seen = set()
+        while move and len(pv) < max(depth, 1) and board.hash not in seen:
+            seen.add(board.hash)
+            decoded = decode_move(move)
+            if move not in legal_moves(board.bitboards, board.turn, board.castling, board.en_passant):
+                break
+            pv.append(decoded)
+            undos.append(board.make_move(*decoded))
+            entry = self.table.get(board.hash)
+            move = entry[3] if entry else 0
+        for undo in reversed(undos):
+            board.unmake_move(undo)
+        return pv
+
+    def _order(self, board: Board, moves: List[int], tt_move: int, ply: int) -> List[int]:
+        squares = board.squares
+        enemy_occupied = board.bitboards.occupied[board.turn ^ 1]
+        killers = self.killers[ply]
+        history = self.history
+        scored = []
+        for move in moves:
+            to_sq = (move >> 6) & 63
+            flag = move >> 12
+            if move == tt_move:
+                score = 1_000_000
+            elif enemy_occupied & (1 << to_sq):
+                victim = (squares[to_sq] - 1) % 6
+                attacker = (squares[move & 63] - 1) % 6
+                score = 100_000 + PIECE_VALUES[victim] * 10 - attacker
+            elif flag == EN_PASSANT:
+                score = 100_000 + PIECE_VALUES[0] * 10
+            elif flag >= PROMOTE_KNIGHT:
+                score = 90_000 + flag
+            elif move == killers[0] or move == killers[1]:
+                score = 80_000
+            else:
+                score = history.get(move & 0xFFF, 0)
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def _check_time(self) -> None:
+        if time.perf_counter() > self.deadline:
+            raise _Timeout
+
+    def _negamax(self, board: Board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        key = board.hash
+        tt_move = 0
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, entry_score, entry_flag, tt_move = entry
+            if ply and entry_depth >= depth:
+                if entry_score > MATE_BOUND:
+                    entry_score -= ply
+                elif entry_score < -MATE_BOUND:
+                    entry_score += ply
+                if entry_flag == EXACT:
+                    return entry_score
+                if entry_flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+
+        bitboards = board.bitboards
+        in_check = board.in_check(board.turn)
+        if in_check:
+            depth += 1
+        if depth <= 0:
+            return self._quiesce(board, alpha, beta, ply)
+        moves = legal_moves(bitboards, board.turn, board.castling, board.en_passant)
+        if not moves:
+            return -MATE + ply if in_check else 0
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = 0
+        enemy_occupied = bitboards.occupied[board.turn ^ 1]
+        for move in self._order(board, moves, tt_move, ply):
+            undo = board.make_move(*decode_move(move))
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                flag = move >> 12
+                if not enemy_occupied & (1 << ((move >> 6) & 63)) and flag != EN_PASSANT \
+                        and flag < PROMOTE_KNIGHT:
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    self.history[move & 0xFFF] = self.history.get(move & 0xFFF, 0) + depth * depth
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored = best_score
+        if stored > MATE_BOUND:
+            stored += ply
+        elif stored < -MATE_BOUND:
+            stored -= ply
+        self.table[key] = (depth, stored, flag, best_move)
+        return best_score
+
+    def _quiesce(self, board: Board, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        bitboards = board.bitboards
+        stand_pat = evaluate(bitboards)
+        if board.turn:
+            stand_pat = -stand_pat
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        moves = legal_moves(bitboards, board.turn, board.castling, board.en_passant)
+        if not moves:
+            return -MATE + ply if board.in_check(board.turn) else 0
+        enemy_occupied = bitboards.occupied[board.turn ^ 1]
+        noisy = [move for move in moves
+                 if enemy_occupied & (1 << ((move >> 6) & 63))
+                 or move >> 12 == EN_PASSANT or move >> 12 == PROMOTE_QUEEN]
+        for move in self._order(board, noisy, 0, ply):
+            undo = board.make_move(*decode_move(move))
+            try:
+                score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
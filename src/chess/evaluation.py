@@ -0,0 +1,118 @@
+"""Static evaluation: material plus piece-square tables.
+
+Tables are laid out like ``Board.grid`` from white's point of view (first
+row is rank 8); black reads them mirrored.
+"""
+from typing import List
+from .bitboard import (BitboardPosition, KNIGHT, BISHOP, ROOK, QUEEN, KING, KNIGHT_ATTACKS,
+                       KING_ATTACKS, bishop_attacks, rook_attacks, iter_bits)
+
+PIECE_VALUES = [100, 320, 330, 500, 900, 0]
+
+PIECE_SQUARE_TABLES = [
+    [  # Pawn
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    [  # Knight
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    [  # Bishop
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    [  # Rook
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ],
+    [  # Queen
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ],
+    [  # King, middlegame
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ],
+]
+
+# Signed score (white positive) per bitboard index and square
+SQUARE_SCORES: List[List[int]] = [
+    [PIECE_VALUES[piece_type] + PIECE_SQUARE_TABLES[piece_type][sq] for sq in range(64)]
+    for piece_type in range(6)
+] + [
+    [-(PIECE_VALUES[piece_type] + PIECE_SQUARE_TABLES[piece_type][sq ^ 56]) for sq in range(64)]
+    for piece_type in range(6)
+]
+
+
+def evaluate(bitboards: BitboardPosition) -> int:
+    """Centipawn score from white's point of view."""
+    score = 0
+    for index, bb in enumerate(bitboards.pieces):
+        table = SQUARE_SCORES[index]
+        for sq in iter_bits(bb):
+            score += table[sq]
+    return score
+
+
+def material(bitboards: BitboardPosition) -> int:
+    """Piece values alone, white's point of view."""
+    pieces = bitboards.pieces
+    return sum(PIECE_VALUES[t] * (bin(pieces[t]).count("1") - bin(pieces[6 + t]).count("1"))
+               for t in range(6))
+
+
+def mobility(bitboards: BitboardPosition, color: int) -> int:
+    """Squares each knight, bishop, rook, queen and king of ``color`` attacks
+    that its own pieces do not occupy, summed over the pieces."""
+    pieces = bitboards.pieces
+    base = color * 6
+    own = bitboards.occupied[color]
+    occupied = own | bitboards.occupied[color ^ 1]
+    count = 0
+    for sq in iter_bits(pieces[base + KNIGHT]):
+        count += bin(KNIGHT_ATTACKS[sq] & ~own).count("1")
+    for sq in iter_bits(pieces[base + BISHOP] | pieces[base + QUEEN]):
+        count += bin(bishop_attacks(sq, occupied) & ~own).count("1")
+    for sq in iter_bits(pieces[base + ROOK] | pieces[base + QUEEN]):
+        count += bin(rook_attacks(sq, occupied) & ~own).count("1")
+    for sq in iter_bits(pieces[base + KING]):
+        count += bin(KING_ATTACKS[sq] & ~own).count("1")
+    return count
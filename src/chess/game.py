@@ -1,28 +1,114 @@
-from typing import List, Optional, Tuple, Dict, Any
-from .board import Board
+import struct
+from typing import List, NamedTuple, Optional, Tuple, Dict, Any, Iterator, Union
+from .board import Board, MoveUndo, PIECES, PIECE_TYPES, PROMOTION_CLASSES
+from .bitboard import COLOR_INDEX, WHITE
+from .movegen import LegalMove, legal_moves, decode_move, move_code
+from .cache import PositionEntry, position_cache
+from .san import move_to_san, parse_san
+from .termination import (FIFTY_MOVES, FIVEFOLD_REPETITION, INSUFFICIENT_MATERIAL, REPETITION,
+                          SEVENTY_FIVE_MOVES, GameTracker)
 from .pieces import King, Queen, Rook, Bishop, Knight, Pawn, Piece
+from . import instrument
 
 
-def is_in_check(board: List[List[Any]], color: str) -> bool:
-    king_pos: Optional[Tuple[int, int]] = None
-    for i in range(8):
-        for j in range(8):
-            piece = board[i][j]
-            if piece and isinstance(piece, King) and piece.color == color:
-                king_pos = (i, j)
-                break
+class GameUndo(NamedTuple):
+    """One played move: the board's undo record plus game-level state."""
+    board: MoveUndo
+    promotion: Optional[str]
+    status: str
+
+
+class SavedGame(NamedTuple):
+    """A game packed for keeping between page runs; see ``Game.save``."""
+    # Snapshot of the start position, or None for the initial position
+    start: Optional[bytes]
+    # Encoded moves, 16 bits each: played oldest first, undone most recent last
+    moves: bytes
+    redo: bytes
+    status: str
+    promoting: bool
+    # The draw claimed at the current position, if any
+    claimed: Optional[str] = None
+
+
+def _pack_moves(codes: List[int]) -> bytes:
+    return struct.pack(f"<{len(codes)}H", *codes)
+
+
+def _unpack_moves(data: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f"<{len(data) // 2}H", data)
+
+
+PROMOTION_PROMPT = "Pawn promotion! Choose piece: Q, R, B, N."
+
+DRAW_MESSAGES = {
+    "stalemate": "Stalemate! Draw.",
+    REPETITION: "Draw claimed by threefold repetition.",
+    FIFTY_MOVES: "Draw claimed under the fifty-move rule.",
+    FIVEFOLD_REPETITION: "Fivefold repetition! Draw.",
+    SEVENTY_FIVE_MOVES: "Seventy-five-move rule! Draw.",
+    INSUFFICIENT_MATERIAL: "Insufficient material! Draw.",
+}
+CLAIM_MESSAGES = {
+    REPETITION: "Threefold repetition: either side may claim a draw.",
+    FIFTY_MOVES: "Fifty-move rule: either side may claim a draw.",
+}
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def is_square_attacked(board: Union[Board, List[List[Any]]], square: Tuple[int, int],
+                       by_color: str) -> bool:
+    """Whether any ``by_color`` piece attacks ``square``.
+
+    Looks outward from the square, stopping at the first attacker found.
+    """
+    if isinstance(board, Board):
+        return board.is_square_attacked(square[0] * 8 + square[1], COLOR_INDEX[by_color])
+    x, y = square
+    # Pawns attack toward the opponent: white ones sit on the row below
+    pawn_row = x + 1 if by_color == "white" else x - 1
+    if 0 <= pawn_row < 8:
+        for dy in (-1, 1):
+            if 0 <= y + dy < 8:
+                piece = board[pawn_row][y + dy]
+                if isinstance(piece, Pawn) and piece.color == by_color:
+                    return True
+    for offsets, kind in ((KNIGHT_OFFSETS, Knight), (KING_OFFSETS, King)):
+        for dx, dy in offsets:
+            i, j = x + dx, y + dy
+            if 0 <= i < 8 and 0 <= j < 8:
+                piece = board[i][j]
+                if isinstance(piece, kind) and piece.color == by_color:
+                    return True
+    for directions, kinds in ((ROOK_DIRECTIONS, (Rook, Queen)), (BISHOP_DIRECTIONS, (Bishop, Queen))):
+        for dx, dy in directions:
+            i, j = x + dx, y + dy
+            while 0 <= i < 8 and 0 <= j < 8:
+                piece = board[i][j]
+                if piece:
+                    if isinstance(piece, kinds) and piece.color == by_color:
+                        return True
+                    break
+                i += dx
+                j += dy
+    return False
+
+
+def is_in_check(board: Union[Board, List[List[Any]]], color: str) -> bool:
+    instrument.incr("check.tests")
+    if isinstance(board, Board):
+        return board.in_check(COLOR_INDEX[color])
+    # Grid path, for callers holding a bare 8x8 list of pieces
     for i in range(8):
         for j in range(8):
             piece = board[i][j]
-            if piece and piece.color != color:
-                if isinstance(piece, Pawn):
-                    moves = piece.valid_moves((i, j), board, None)
-                elif isinstance(piece, King):
-                    moves = piece.valid_moves((i, j), board, False, False)
-                else:
-                    moves = piece.valid_moves((i, j), board)
-                if king_pos in moves:
-                    return True
+            if isinstance(piece, King) and piece.color == color:
+                enemy = "black" if color == "white" else "white"
+                return is_square_attacked(board, (i, j), enemy)
     return False
 
 
@@ -32,180 +118,327 @@ class Game:
         self.current_turn: str = "white"
         self.status: str = "Game in Progress"
         self.promoting: Optional[Tuple[int, int]] = None
-        self.en_passant_target: Optional[Tuple[int, int]] = None
-        self.castling_rights: Dict[str, Dict[str, bool]] = {
-            "white": {"kingside": True, "queenside": True},
-            "black": {"kingside": True, "queenside": True}
-        }
+        # Derived facts for the current position, dropped on every change
+        self._entry: Optional[PositionEntry] = None
+        self.undo_stack: List[GameUndo] = []
+        self.redo_stack: List[LegalMove] = []
+        # Snapshot of the start position when it is not the initial one
+        self.start: Optional[bytes] = None
+        self.tracker = GameTracker(self.board)
+        # Draw claimed at the current position; undo takes it back
+        self.claimed: Optional[str] = None
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "Game":
+        """A game starting from the position in ``fen``."""
+        game = cls()
+        game.board = Board.from_fen(fen)
+        game.start = game.board.snapshot()
+        game.tracker = GameTracker(game.board)
+        game.current_turn = "white" if game.board.turn == WHITE else "black"
+        game._update_status("black" if game.current_turn == "white" else "white", game.status)
+        return game
+
+    def to_fen(self) -> str:
+        return self.board.to_fen()
+
+    def save(self) -> SavedGame:
+        """The game as a start snapshot plus packed move lists."""
+        played = [move_code(LegalMove(u.board.from_pos, u.board.to_pos, u.board.special, u.promotion))
+                  for u in self.undo_stack]
+        return SavedGame(self.start, _pack_moves(played),
+                         _pack_moves([move_code(move) for move in self.redo_stack]),
+                         self.status, self.promoting is not None, self.claimed)
+
+    @classmethod
+    def restore(cls, saved: SavedGame) -> "Game":
+        """Rebuild a saved game by replaying its moves.
+
+        Only the current status message is kept; earlier ones come back as
+        "Move successful." on undo.
+        """
+        game = cls()
+        if saved.start is not None:
+            game.board = Board.from_snapshot(saved.start)
+            game.start = saved.start
+            game.tracker = GameTracker(game.board)
+        board = game.board
+        status = game.status
+        for code in _unpack_moves(saved.moves):
+            move = decode_move(code)
+            record = board.make_move(move.from_pos, move.to_pos, move.special, move.promotion)
+            game.tracker.push(board, record, move.promotion)
+            game.undo_stack.append(GameUndo(record, move.promotion, status))
+            status = "Move successful."
+        game.redo_stack = [decode_move(code) for code in _unpack_moves(saved.redo)]
+        game.status = saved.status
+        game.claimed = saved.claimed
+        game.current_turn = "white" if board.turn == WHITE else "black"
+        if saved.promoting:
+            last = game.undo_stack[-1].board
+            game.promoting = last.to_pos
+            game.current_turn = PIECES[last.piece].color
+        return game
+
+    @property
+    def en_passant_target(self) -> Optional[Tuple[int, int]]:
+        return self.board.en_passant_target
+
+    @property
+    def castling_rights(self) -> Dict[str, Dict[str, bool]]:
+        return self.board.castling_rights
+
+    @property
+    def result(self) -> Optional[str]:
+        """How the game ended at the current position, or None while it goes on.
+
+        "checkmate", "stalemate", or one of the draws in ``chess.termination``;
+        threefold repetition and the fifty-move rule only once claimed.
+        """
+        if self.promoting:
+            return None
+        if self.claimed:
+            return self.claimed
+        status = self._position().status
+        if status == "checkmate" or status == "stalemate":
+            return status
+        return self.tracker.draw(self.board)
+
+    @property
+    def draw_claim(self) -> Optional[str]:
+        """The draw the side to move may claim now, or None."""
+        if self.promoting or self.result is not None:
+            return None
+        return self.tracker.claimable(self.board)
+
+    def claim_draw(self) -> bool:
+        """End the game as a draw if one can be claimed; False otherwise."""
+        reason = self.draw_claim
+        if reason is None:
+            if self.result is None:
+                self.status = "No draw to claim."
+            return False
+        self.claimed = reason
+        self.status = DRAW_MESSAGES[reason]
+        return True
 
+    def legal_moves(self) -> Iterator[LegalMove]:
+        """Legal moves for the side to move, one per promotion piece; none
+        mid-promotion or once the game is over."""
+        if self.promoting or self.result is not None:
+            return
+        for move in self._legal_codes():
+            yield decode_move(move)
+
+    def targets(self) -> Dict[int, Tuple[int, ...]]:
+        """Legal destination squares of the side to move by origin square,
+        both ``row * 8 + col``; empty mid-promotion or once the game is over.
+
+        Grouped once per position and kept in the position cache; never mutate.
+        """
+        if self.promoting or self.result is not None:
+            return {}
+        entry = self._position()
+        if entry.targets is None:
+            grouped: Dict[int, List[int]] = {}
+            for code in entry.moves:
+                grouped.setdefault(code & 63, []).append(code >> 6 & 63)
+            # Promotions repeat a destination once per piece
+            entry.targets = {origin: tuple(dict.fromkeys(squares))
+                             for origin, squares in grouped.items()}
+        return entry.targets
+
+    def _legal_codes(self) -> List[int]:
+        return self._position().moves
+
+    def _position(self) -> PositionEntry:
+        if self._entry is not None:
+            return self._entry
+        board = self.board
+        color = COLOR_INDEX[self.current_turn]
+        # Mid-promotion the board already has the opponent to move
+        cacheable = color == board.turn
+        entry = position_cache.get(board.hash) if cacheable else None
+        if entry is None:
+            entry = PositionEntry()
+            if cacheable:
+                position_cache.put(board.hash, entry)
+        if entry.moves is None:
+            entry.moves = self._generate(self.current_turn)
+            instrument.incr("check.tests")
+            entry.in_check = board.in_check(color)
+        self._entry = entry
+        return entry
+
+    def _generate(self, color: str) -> List[int]:
+        instrument.incr("movegen.calls")
+        board = self.board
+        return legal_moves(board.bitboards, COLOR_INDEX[color], board.castling, board.en_passant)
+
+    @instrument.timed("game.move")
     def move(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> bool:
+        if self.promoting:
+            # The pawn's side still has to pick a piece
+            self.status = PROMOTION_PROMPT
+            return False
         fx, fy = from_pos
         tx, ty = to_pos
-        piece = self.board.grid[fx][fy]
+        piece = self.board.piece_at(from_pos)
         if not piece:
             self.status = "No piece at source."
             return False
         if piece.color != self.current_turn:
             self.status = f"It's {self.current_turn}'s turn."
             return False
-
-        # Determine valid moves with special rules
-        valid: List[Tuple[int, int]] = []
-        special: Optional[str] = None
-        if isinstance(piece, Pawn):
-            valid = piece.valid_moves(
-                (fx, fy), self.board.grid, self.en_passant_target)
-            # En passant
-            if self.en_passant_target and (tx, ty) == self.en_passant_target and fy != ty and self.board.grid[tx][ty] is None:
-                special = "en_passant"
-        elif isinstance(piece, King):
-            can_castle_kingside = self.castling_rights[piece.color]["kingside"]
-            can_castle_queenside = self.castling_rights[piece.color]["queenside"]
-            valid = piece.valid_moves(
-                (fx, fy), self.board.grid, can_castle_kingside, can_castle_queenside)
-            # Castling
-            if (tx, ty) == (fx, 6):
-                special = "castle_kingside"
-            elif (tx, ty) == (fx, 2):
-                special = "castle_queenside"
-        else:
-            valid = piece.valid_moves((fx, fy), self.board.grid)
-
-        if (tx, ty) not in valid:
-            self.status = "Invalid move for this piece."
+        if self.result is not None:
+            # Keep the status saying how the game ended
             return False
 
-        # Make a copy of the board to test for checks
-        import copy
-        test_board = copy.deepcopy(self.board.grid)
-        if special == "en_passant":
-            test_board[tx][ty] = piece
-            test_board[fx][fy] = None
-            test_board[fx][ty] = None
-        elif special == "castle_kingside":
-            test_board[fx][6] = piece
-            test_board[fx][4] = None
-            test_board[fx][5] = test_board[fx][7]
-            test_board[fx][7] = None
-        elif special == "castle_queenside":
-            test_board[fx][2] = piece
-            test_board[fx][4] = None
-            test_board[fx][3] = test_board[fx][0]
-            test_board[fx][0] = None
-        else:
-            test_board[tx][ty] = piece
-            test_board[fx][fy] = None
-
-        if is_in_check(test_board, self.current_turn):
-            self.status = "Move would leave king in check."
+        # Find the move among the legal ones; promotions are picked later
+        key = (fx * 8 + fy) | ((tx * 8 + ty) << 6)
+        chosen: Optional[LegalMove] = None
+        for move in self._legal_codes():
+            if move & 0xFFF == key:
+                chosen = decode_move(move)
+                break
+        if chosen is None:
+            if self._pseudo_legal(from_pos, to_pos, piece):
+                self.status = "Move would leave king in check."
+            else:
+                self.status = "Invalid move for this piece."
             return False
 
-        # Move is valid, update castling/en passant rights
-        if isinstance(piece, King):
-            self.castling_rights[piece.color]["kingside"] = False
-            self.castling_rights[piece.color]["queenside"] = False
-        if isinstance(piece, Rook):
-            if fx == (7 if piece.color == "white" else 0) and fy == 0:
-                self.castling_rights[piece.color]["queenside"] = False
-            if fx == (7 if piece.color == "white" else 0) and fy == 7:
-                self.castling_rights[piece.color]["kingside"] = False
-
-        # Set en passant target
-        self.en_passant_target = None
-        if isinstance(piece, Pawn) and abs(tx - fx) == 2:
-            self.en_passant_target = ((fx + tx) // 2, fy)
-
-        self.board.move_piece(from_pos, to_pos, special)
+        # Move is valid; the board updates castling/en passant rights
+        record = self.board.make_move(from_pos, to_pos, chosen.special)
+        self.tracker.push(self.board, record, None)
+        self.undo_stack.append(GameUndo(record, None, self.status))
+        self.redo_stack.clear()
+        self._entry = None
 
         # Pawn promotion
         if isinstance(piece, Pawn) and (tx == 0 or tx == 7):
             self.promoting = (tx, ty)
-            self.status = "Pawn promotion! Choose piece: Q, R, B, N."
+            self.status = PROMOTION_PROMPT
             return True
 
         # Switch turn
         self.current_turn = "black" if self.current_turn == "white" else "white"
-        # Check for checkmate or stalemate
-        if self.is_checkmate(self.current_turn):
-            self.status = f"Checkmate! {piece.color.capitalize()} wins."
-        elif self.is_stalemate(self.current_turn):
-            self.status = "Stalemate! Draw."
-        else:
-            self.status = "Move successful."
+        self._update_status(piece.color)
         return True
 
+    def san(self, move: LegalMove) -> str:
+        """SAN for a legal move of the side to move."""
+        board = self.board
+        key = (move.from_pos[0] * 8 + move.from_pos[1]) | ((move.to_pos[0] * 8 + move.to_pos[1]) << 6)
+        codes = self._legal_codes()
+        for code in codes:
+            if code & 0xFFF == key and decode_move(code).promotion == move.promotion:
+                return move_to_san(board, code, codes)
+        raise ValueError(f"Illegal move: {move}")
+
+    def move_san(self, san: str) -> bool:
+        """Play a move written in SAN, promotion included."""
+        if self.promoting:
+            self.status = PROMOTION_PROMPT
+            return False
+        try:
+            move = decode_move(parse_san(self.board, san, self._legal_codes()))
+        except ValueError as error:
+            self.status = str(error)
+            return False
+        if not self.move(move.from_pos, move.to_pos):
+            return False
+        if move.promotion:
+            self.promote(move.promotion)
+        return True
+
+    def _pseudo_legal(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int], piece: Piece) -> bool:
+        # Only used to word the rejection of an illegal move
+        board = self.board
+        color = COLOR_INDEX[piece.color]
+        castling = board.castling >> (2 * color)
+        targets = board.bitboards.targets(
+            from_pos[0] * 8 + from_pos[1], color, PIECE_TYPES[type(piece)], board.en_passant,
+            bool(castling & 1), bool(castling & 2))
+        return bool(targets & (1 << (to_pos[0] * 8 + to_pos[1])))
+
+    def _update_status(self, mover: str, done: str = "Move successful.") -> None:
+        # One move generation decides both checkmate and stalemate
+        result = self.result
+        if result == "checkmate":
+            self.status = f"Checkmate! {mover.capitalize()} wins."
+        elif result is not None:
+            self.status = DRAW_MESSAGES[result]
+        else:
+            claim = self.tracker.claimable(self.board)
+            self.status = CLAIM_MESSAGES[claim] if claim else done
+
+    @instrument.timed("game.promote")
     def promote(self, piece_type: str) -> None:
-        if not self.promoting:
+        if not self.promoting or piece_type not in PROMOTION_CLASSES:
             return
-        x, y = self.promoting
-        color = self.current_turn
-        if piece_type == "Q":
-            self.board.grid[x][y] = Queen(color)
-        elif piece_type == "R":
-            self.board.grid[x][y] = Rook(color)
-        elif piece_type == "B":
-            self.board.grid[x][y] = Bishop(color)
-        elif piece_type == "N":
-            self.board.grid[x][y] = Knight(color)
+        # Replay the pawn move with the piece chosen, so undo stays exact
+        last = self.undo_stack.pop()
+        self.tracker.pop(self.board, last.board, None)
+        self.board.unmake_move(last.board)
+        record = self.board.make_move(last.board.from_pos, last.board.to_pos,
+                                      last.board.special, piece_type)
+        self.tracker.push(self.board, record, piece_type)
+        self.undo_stack.append(GameUndo(record, piece_type, last.status))
         self.promoting = None
-        self.current_turn = "black" if self.current_turn == "white" else "white"
-        self.status = "Promotion complete."
+        mover = self.current_turn
+        self.current_turn = "black" if mover == "white" else "white"
+        self._entry = None
+        self._update_status(mover, "Promotion complete.")
 
-    def is_checkmate(self, color: str) -> bool:
-        if not is_in_check(self.board.grid, color):
+    @property
+    def history(self) -> List[LegalMove]:
+        """Moves played so far, oldest first."""
+        return [LegalMove(u.board.from_pos, u.board.to_pos, u.board.special, u.promotion)
+                for u in self.undo_stack]
+
+    def undo(self) -> bool:
+        """Take back the last move (or a pending promotion); False if none."""
+        if not self.undo_stack:
             return False
-        for i in range(8):
-            for j in range(8):
-                piece = self.board.grid[i][j]
-                if piece and piece.color == color:
-                    if isinstance(piece, Pawn):
-                        moves = piece.valid_moves(
-                            (i, j), self.board.grid, self.en_passant_target)
-                    elif isinstance(piece, King):
-                        can_castle_kingside = self.castling_rights[piece.color]["kingside"]
-                        can_castle_queenside = self.castling_rights[piece.color]["queenside"]
-                        moves = piece.valid_moves(
-                            (i, j), self.board.grid, can_castle_kingside, can_castle_queenside)
-                    else:
-                        moves = piece.valid_moves((i, j), self.board.grid)
-                    for move in moves:
-                        import copy
-                        test_board = copy.deepcopy(self.board.grid)
-                        fx, fy = i, j
-                        tx, ty = move
-                        test_board[tx][ty] = piece
-                        test_board[fx][fy] = None
-                        if not is_in_check(test_board, color):
-                            return False
+        last = self.undo_stack.pop()
+        self.tracker.pop(self.board, last.board, last.promotion)
+        self.board.unmake_move(last.board)
+        self.claimed = None
+        if self.promoting:
+            # The promotion was never chosen, so there is nothing to redo
+            self.promoting = None
+        else:
+            self.redo_stack.append(
+                LegalMove(last.board.from_pos, last.board.to_pos, last.board.special, last.promotion))
+        self.current_turn = PIECES[last.board.piece].color
+        self.status = last.status
+        self._entry = None
         return True
 
-    def is_stalemate(self, color: str) -> bool:
-        if is_in_check(self.board.grid, color):
+    def redo(self) -> bool:
+        """Replay the last undone move; False if none."""
+        if not self.redo_stack:
             return False
-        for i in range(8):
-            for j in range(8):
-                piece = self.board.grid[i][j]
-                if piece and piece.color == color:
-                    if isinstance(piece, Pawn):
-                        moves = piece.valid_moves(
-                            (i, j), self.board.grid, self.en_passant_target)
-                    elif isinstance(piece, King):
-                        can_castle_kingside = self.castling_rights[piece.color]["kingside"]
-                        can_castle_queenside = self.castling_rights[piece.color]["queenside"]
-                        moves = piece.valid_moves(
-                            (i, j), self.board.grid, can_castle_kingside, can_castle_queenside)
-                    else:
-                        moves = piece.valid_moves((i, j), self.board.grid)
-                    for move in moves:
-                        import copy
-                        test_board = copy.deepcopy(self.board.grid)
-                        fx, fy = i, j
-                        tx, ty = move
-                        test_board[tx][ty] = piece
-                        test_board[fx][fy] = None
-                        if not is_in_check(test_board, color):
-                            return False
+        move = self.redo_stack.pop()
+        mover = self.current_turn
+        record = self.board.make_move(move.from_pos, move.to_pos, move.special, move.promotion)
+        self.tracker.push(self.board, record, move.promotion)
+        self.undo_stack.append(GameUndo(record, move.promotion, self.status))
+        self.current_turn = "black" if mover == "white" else "white"
+        self._entry = None
+        self._update_status(mover, "Promotion complete." if move.promotion else "Move successful.")
         return True
 
+    def is_checkmate(self, color: str) -> bool:
+        if color == self.current_turn:
+            return self._position().status == "checkmate"
+        return is_in_check(self.board, color) and not self._generate(color)
+
+    def is_stalemate(self, color: str) -> bool:
+        if color == self.current_turn:
+            return self._position().status == "stalemate"
+        return not is_in_check(self.board, color) and not self._generate(color)
+
     def get_board_symbols(self) -> List[List[str]]:
         return self.board.get_board_symbols()
@@ -0,0 +1,258 @@
+"""Append-only game store with a sorted position index, read through mmap.
+
+``<name>.games`` holds the games: a small header, then per game the ply
+count, a flag byte, an optional 38-byte start snapshot (games that do not
+start from the initial position) and one 16-bit encoded move per ply.
+
+``<name>.idx`` holds one fixed-size entry per position reached, sorted by
+Zobrist hash: (hash, game offset, ply, next move or 0 at the game's end).
+A lookup is a binary search over the mapped file, so it never scans the
+games.
+
+Run from ``src``::
+
+    python -m chess.gamedb build games.pgn data/games   # import, then index
+    python -m chess.gamedb query data/games --fen "<fen>"
+"""
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from .board import Board, SNAPSHOT
+from .movegen import decode_move
+from .pgn import read_games
+from .san import move_to_san, parse_san
+
+MAGIC = b"CGDB\x01\x00\x00\x00"
+RECORD = struct.Struct("<HB")
+HAS_START = 1
+ENTRY = struct.Struct("<QQHH")
+
+
+class StoredGame(NamedTuple):
+    offset: int
+    # Snapshot of the start position, or None for the initial position
+    start: Optional[bytes]
+    moves: List[int]
+
+    def board(self) -> Board:
+        return Board.from_snapshot(self.start) if self.start else Board()
+
+
+class PositionStats(NamedTuple):
+    # Distinct games that reached the position
+    games: int
+    # (encoded move, times played), most played first
+    moves: List[Tuple[int, int]]
+
+
+def encode_game(moves: Sequence[int], start: Optional[bytes] = None) -> bytes:
+    if len(moves) > 0xFFFF:
+        raise ValueError("Game too long to store")
+    flags = HAS_START if start else 0
+    return (RECORD.pack(len(moves), flags) + (start or b"")
+            + struct.pack(f"<{len(moves)}H", *moves))
+
+
+def write_games(name: str, games: Iterable[Tuple[Sequence[int], Optional[bytes]]]) -> int:
+    """Append (moves, start snapshot) pairs to the store; returns the count."""
+    path = name + ".games"
+    count = 0
+    with open(path, "ab") as handle:
+        if handle.tell() == 0:
+            handle.write(MAGIC)
+        for moves, start in games:
+            handle.write(encode_game(moves, start))
+            count += 1
+    return count
+
+
+def pgn_games(path: str, rejected: Optional[List[str]] = None) -> Iterator[Tuple[List[int], Optional[bytes]]]:
+    """Encoded moves of each game in a PGN file; games with an illegal move are skipped."""
+    for pgn in read_games(path):
+        try:
+            if pgn.headers.get("SetUp") == "1" and "FEN" in pgn.headers:
+                board = Board.from_fen(pgn.headers["FEN"])
+                start: Optional[bytes] = board.snapshot()
+            else:
+                board = Board()
+                start = None
+            moves: List[int] = []
+            for san in pgn.moves:
+                move = parse_san(board, san)
+                board.make_move(*decode_move(move))
+                moves.append(move)
+        except ValueError as error:
+            if rejected is not None:
+                white, black = pgn.headers.get("White", "?"), pgn.headers.get("Black", "?")
+                rejected.append(f"{white} - {black}: {error}")
+            continue
+        yield moves, start
+
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as handle:
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _iter_records(data: mmap.mmap) -> Iterator[StoredGame]:
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a game store")
+    offset = len(MAGIC)
+    end = len(data)
+    while offset < end:
+        game = _read_record(data, offset)
+        yield game
+        offset += RECORD.size + (SNAPSHOT.size if game.start else 0) + 2 * len(game.moves)
+
+
+def _read_record(data: mmap.mmap, offset: int) -> StoredGame:
+    plies, flags = RECORD.unpack_from(data, offset)
+    pos = offset + RECORD.size
+    start = None
+    if flags & HAS_START:
+        start = bytes(data[pos:pos + SNAPSHOT.size])
+        pos += SNAPSHOT.size
+    return StoredGame(offset, start, list(struct.unpack_from(f"<{plies}H", data, pos)))
+
+
+def build_index(name: str) -> int:
+    """Rewrite ``<name>.idx`` from the games file; returns the entry count.
+
+    Entries are sorted in memory (20 bytes each plus list overhead).
+    """
+    data = _map(name + ".games")
+    entries: List[Tuple[int, int, int, int]] = []
+    if data is not None:
+        try:
+            for game in _iter_records(data):
+                board = game.board()
+                for ply, move in enumerate(game.moves):
+                    entries.append((board.hash, game.offset, ply, move))
+                    board.make_move(*decode_move(move))
+                entries.append((board.hash, game.offset, len(game.moves), 0))
+        finally:
+            data.close()
+    entries.sort()
+    tmp = name + ".idx.tmp"
+    with open(tmp, "wb") as handle:
+        for entry in entries:
+            handle.write(ENTRY.pack(*entry))
+    os.replace(tmp, name + ".idx")
+    return len(entries)
+
+
+class _Keys:
+    """The index's hashes as a sequence, for bisect."""
+
+    def __init__(self, data: mmap.mmap) -> None:
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data) // ENTRY.size
+
+    def __getitem__(self, i: int) -> int:
+        return struct.unpack_from("<Q", self.data, i * ENTRY.size)[0]
+
+
+class GameStore:
+    """Read-only view of a store; reopen after writing to see new games."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.games = _map(name + ".games")
+        self.index = _map(name + ".idx")
+
+    def __len__(self) -> int:
+        return len(self.index) // ENTRY.size if self.index is not None else 0
+
+    def close(self) -> None:
+        for data in (self.games, self.index):
+            if data is not None:
+                data.close()
+
+    def entries(self, key: int) -> List[Tuple[int, int, int, int]]:
+        """Index entries for the position with Zobrist hash ``key``."""
+        if self.index is None:
+            return []
+        keys = _Keys(self.index)
+        i = bisect.bisect_left(keys, key)
+        found = []
+        while i < len(keys):
+            entry = ENTRY.unpack_from(self.index, i * ENTRY.size)
+            if entry[0] != key:
+                break
+            found.append(entry)
+            i += 1
+        return found
+
+    def lookup(self, board: Board) -> PositionStats:
+        entries = self.entries(board.hash)
+        counts: Dict[int, int] = {}
+        for _, _, _, move in entries:
+            if move:
+                counts[move] = counts.get(move, 0) + 1
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return PositionStats(len({entry[1] for entry in entries}), ranked)
+
+    def games_at(self, board: Board, limit: int = 20) -> List[StoredGame]:
+        """Stored games that reached the position on ``board``."""
+        offsets: List[int] = []
+        for _, offset, _, _ in self.entries(board.hash):
+            if offset not in offsets:
+                offsets.append(offset)
+                if len(offsets) == limit:
+                    break
+        return [self.game(offset) for offset in offsets]
+
+    def game(self, offset: int) -> StoredGame:
+        if self.games is None:
+            raise ValueError("Empty game store")
+        return _read_record(self.games, offset)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build and query the game store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="import a PGN file and rebuild the index")
+    build.add_argument("pgn")
+    build.add_argument("name", help="store path without extension")
+    query = commands.add_parser("query", help="next-move statistics for a position")
+    query.add_argument("name")
+    query.add_argument("--fen", help="position (default: initial position)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        rejected: List[str] = []
+        count = write_games(args.name, pgn_games(args.pgn, rejected))
+        entries = build_index(args.name)
+        for error in rejected:
+            print(f"skipped {error}")
+        print(f"{count} games added, {entries} positions indexed in "
+              f"{time.perf_counter() - start:.2f}s")
+        return 0
+
+    board = Board.from_fen(args.fen) if args.fen else Board()
+    store = GameStore(args.name)
+    try:
+        start = time.perf_counter()
+        stats = store.lookup(board)
+        elapsed = time.perf_counter() - start
+    finally:
+        store.close()
+    total = sum(count for _, count in stats.moves)
+    for move, count in stats.moves:
+        print(f"{move_to_san(board, move):<8} {count:>8}  {100 * count / total:5.1f}%")
+    print(f"{stats.games} games reached this position ({elapsed * 1e6:.0f}us lookup)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
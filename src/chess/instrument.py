@@ -0,0 +1,172 @@
+"""Process-wide timers and counters for the app's hot paths.
+
+Disabled by default; while disabled every hook is a flag test, so the
+instrumented code pays a few tens of nanoseconds per call. Enabling it
+affects every session served by the process.
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+enabled = False
+_lock = threading.Lock()
+counters: Dict[str, int] = {}
+# name -> [calls, total seconds, slowest call]
+timers: Dict[str, List[float]] = {}
+# name -> function returning that cache's stats dict
+caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_profile_lock = threading.Lock()
+PROFILER_BUSY = "profiler busy: another interaction was being profiled"
+
+
+def enable(on: bool = True) -> None:
+    global enabled
+    enabled = on
+
+
+def reset() -> None:
+    with _lock:
+        counters.clear()
+        timers.clear()
+
+
+def incr(name: str, amount: int = 1) -> None:
+    if enabled:
+        with _lock:
+            counters[name] = counters.get(name, 0) + amount
+
+
+def record(name: str, seconds: float) -> None:
+    with _lock:
+        entry = timers.get(name)
+        if entry is None:
+            timers[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+
+class timer:
+    """Context manager timing its block under ``name`` when enabled."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "timer":
+        if enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if enabled and self.start:
+            record(self.name, time.perf_counter() - self.start)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator form of ``timer``."""
+    def decorate(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+
+def register_cache(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    caches[name] = stats
+
+
+def snapshot() -> Dict[str, Any]:
+    """Everything recorded so far, as plain JSON-ready data."""
+    with _lock:
+        timer_data = {
+            name: {"calls": int(calls), "total_ms": total * 1000,
+                   "mean_us": total / calls * 1e6, "max_ms": slowest * 1000}
+            for name, (calls, total, slowest) in sorted(timers.items())}
+        counter_data = dict(sorted(counters.items()))
+    return {"time": time.time(), "enabled": enabled, "timers": timer_data,
+            "counters": counter_data,
+            "caches": {name: stats() for name, stats in sorted(caches.items())}}
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def latency_summary(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """Count, mean and p50/p95/p99/max in milliseconds per operation, from seconds."""
+    summary = {}
+    for name, values in sorted(samples.items()):
+        ordered = sorted(values)
+        summary[name] = {"count": len(ordered),
+                         "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+                         "p50_ms": percentile(ordered, 0.50) * 1000,
+                         "p95_ms": percentile(ordered, 0.95) * 1000,
+                         "p99_ms": percentile(ordered, 0.99) * 1000,
+                         "max_ms": ordered[-1] * 1000 if ordered else 0.0}
+    return summary
+
+
+def dump(path: str) -> None:
+    """Append the current snapshot to a JSON-lines file."""
+    with open(path, "a") as handle:
+        handle.write(json.dumps(snapshot()) + "\n")
+
+
+class Profile:
+    """cProfile capture of a block, for the calling thread only."""
+
+    def __init__(self) -> None:
+        self.profiler: Optional[cProfile.Profile] = None
+        self.busy = False
+
+    def __enter__(self) -> "Profile":
+        # One capture per process: sessions run on separate threads, and from
+        # Python 3.12 a second enable() raises while another profiler is active
+        if not _profile_lock.acquire(blocking=False):
+            self.busy = True
+            return self
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            _profile_lock.release()
+            self.busy = True
+            return self
+        self.profiler = profiler
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.profiler is not None:
+            self.profiler.disable()
+            _profile_lock.release()
+
+    def report(self, limit: int = 20, sort: str = "cumulative") -> str:
+        if self.busy:
+            return PROFILER_BUSY
+        if self.profiler is None:
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
@@ -0,0 +1,193 @@
+"""Legal move generation from check, pin and king-danger masks.
+
+Moves are encoded as ints: bits 0-5 hold the from square, bits 6-11 the to
+square and bits 12-14 a flag for special moves and promotions.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+from .bitboard import (BitboardPosition, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                       KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, ROOK_RAYS, BISHOP_RAYS,
+                       rook_attacks, bishop_attacks, iter_bits)
+
+NORMAL, EN_PASSANT, CASTLE_KINGSIDE, CASTLE_QUEENSIDE = 0, 1, 2, 3
+PROMOTE_KNIGHT, PROMOTE_BISHOP, PROMOTE_ROOK, PROMOTE_QUEEN = 4, 5, 6, 7
+
+SPECIALS = {EN_PASSANT: "en_passant", CASTLE_KINGSIDE: "castle_kingside",
+            CASTLE_QUEENSIDE: "castle_queenside"}
+PROMOTIONS = {PROMOTE_KNIGHT: "N", PROMOTE_BISHOP: "B",
+              PROMOTE_ROOK: "R", PROMOTE_QUEEN: "Q"}
+FLAGS = {name: flag for flag, name in (*SPECIALS.items(), *PROMOTIONS.items())}
+
+BACK_RANKS = 0xFF | (0xFF << 56)
+
+
+class LegalMove(NamedTuple):
+    from_pos: Tuple[int, int]
+    to_pos: Tuple[int, int]
+    special: Optional[str]
+    promotion: Optional[str]
+
+
+def encode_move(from_sq: int, to_sq: int, flag: int = NORMAL) -> int:
+    return from_sq | (to_sq << 6) | (flag << 12)
+
+
+def decode_move(move: int) -> LegalMove:
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+    flag = move >> 12
+    return LegalMove((from_sq >> 3, from_sq & 7), (to_sq >> 3, to_sq & 7),
+                     SPECIALS.get(flag), PROMOTIONS.get(flag))
+
+
+def move_code(move: LegalMove) -> int:
+    """Inverse of ``decode_move``."""
+    flag = FLAGS.get(move.promotion or move.special, NORMAL)
+    return encode_move(move.from_pos[0] * 8 + move.from_pos[1],
+                       move.to_pos[0] * 8 + move.to_pos[1], flag)
+
+
+def attacked_squares(bitboards: BitboardPosition, color: int, occupied: int) -> int:
+    """Every square attacked by ``color`` given the occupancy ``occupied``."""
+    pieces = bitboards.pieces
+    base = color * 6
+    attacks = 0
+    pawn_table = PAWN_ATTACKS[color]
+    for sq in iter_bits(pieces[base + PAWN]):
+        attacks |= pawn_table[sq]
+    for sq in iter_bits(pieces[base + KNIGHT]):
+        attacks |= KNIGHT_ATTACKS[sq]
+    queens = pieces[base + QUEEN]
+    for sq in iter_bits(pieces[base + BISHOP] | queens):
+        attacks |= bishop_attacks(sq, occupied)
+    for sq in iter_bits(pieces[base + ROOK] | queens):
+        attacks |= rook_attacks(sq, occupied)
+    for sq in iter_bits(pieces[base + KING]):
+        attacks |= KING_ATTACKS[sq]
+    return attacks
+
+
+def _add_pawn_moves(moves: List[int], from_sq: int, targets: int) -> None:
+    for to_sq in iter_bits(targets):
+        if (1 << to_sq) & BACK_RANKS:
+            base = from_sq | (to_sq << 6)
+            moves.append(base | (PROMOTE_QUEEN << 12))
+            moves.append(base | (PROMOTE_ROOK << 12))
+            moves.append(base | (PROMOTE_BISHOP << 12))
+            moves.append(base | (PROMOTE_KNIGHT << 12))
+        else:
+            moves.append(from_sq | (to_sq << 6))
+
+
+def legal_moves(bitboards: BitboardPosition, color: int, castling: int,
+                en_passant: Optional[int]) -> List[int]:
+    """All legal moves for ``color``, with each promotion expanded four ways."""
+    pieces = bitboards.pieces
+    enemy = color ^ 1
+    base = color * 6
+    enemy_base = enemy * 6
+    own = bitboards.occupied[color]
+    theirs = bitboards.occupied[enemy]
+    occupied = own | theirs
+    king_sq = bitboards.king_square(color)
+    king_bit = 1 << king_sq
+    moves: List[int] = []
+
+    # Squares the king may not step to; sliders see through the king
+    danger = attacked_squares(bitboards, enemy, occupied ^ king_bit)
+    for to_sq in iter_bits(KING_ATTACKS[king_sq] & ~own & ~danger):
+        moves.append(king_sq | (to_sq << 6))
+
+    # Checkers, the squares that answer a single check and pin rays
+    checkers = (KNIGHT_ATTACKS[king_sq] & pieces[enemy_base + KNIGHT]) | \
+        (PAWN_ATTACKS[color][king_sq] & pieces[enemy_base + PAWN])
+    check_mask = checkers
+    pin_rays = {}
+    enemy_queens = pieces[enemy_base + QUEEN]
+    for rays, sliders in ((ROOK_RAYS, pieces[enemy_base + ROOK] | enemy_queens),
+                          (BISHOP_RAYS, pieces[enemy_base + BISHOP] | enemy_queens)):
+        if not sliders:
+            continue
+        for table, positive in rays:
+            ray = table[king_sq]
+            if not ray & sliders:
+                continue
+            blockers = ray & occupied
+            first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+            first_bit = 1 << first
+            if first_bit & sliders:
+                checkers |= first_bit
+                check_mask |= ray & ~table[first]
+                continue
+            if not first_bit & own:
+                continue
+            blockers ^= first_bit
+            if not blockers:
+                continue
+            second = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+            if (1 << second) & sliders:
+                pin_rays[first] = ray & ~table[second]
+
+    if checkers & (checkers - 1):
+        # Double check: only the king may move
+        return moves
+    if not checkers:
+        check_mask = ~0
+        # Castling: king not in check, path empty and not attacked
+        home = 60 if color == 0 else 4
+        rights = castling >> (2 * color)
+        if king_sq == home:
+            rooks = pieces[base + ROOK]
+            if rights & 1 and rooks & (1 << (home + 3)) and \
+                    not (occupied | danger) & (0b11 << (home + 1)):
+                moves.append(home | ((home + 2) << 6) | (CASTLE_KINGSIDE << 12))
+            if rights & 2 and rooks & (1 << (home - 4)) and \
+                    not occupied & (0b111 << (home - 3)) and not danger & (0b11 << (home - 2)):
+                moves.append(home | ((home - 2) << 6) | (CASTLE_QUEENSIDE << 12))
+
+    not_own = ~own
+    # Knights (a pinned knight can never move)
+    for from_sq in iter_bits(pieces[base + KNIGHT]):
+        if from_sq in pin_rays:
+            continue
+        for to_sq in iter_bits(KNIGHT_ATTACKS[from_sq] & not_own & check_mask):
+            moves.append(from_sq | (to_sq << 6))
+    # Sliders
+    queens = pieces[base + QUEEN]
+    for attack, sliders in ((bishop_attacks, pieces[base + BISHOP] | queens),
+                            (rook_attacks, pieces[base + ROOK] | queens)):
+        for from_sq in iter_bits(sliders):
+            targets = attack(from_sq, occupied) & not_own & check_mask
+            if from_sq in pin_rays:
+                targets &= pin_rays[from_sq]
+            for to_sq in iter_bits(targets):
+                moves.append(from_sq | (to_sq << 6))
+    # Pawns
+    pawn_table = PAWN_ATTACKS[color]
+    step = -8 if color == 0 else 8
+    start_rows = 0xFF << 48 if color == 0 else 0xFF << 8
+    for from_sq in iter_bits(pieces[base + PAWN]):
+        targets = pawn_table[from_sq] & theirs
+        one = from_sq + step
+        # A pawn on the last rank (mid-promotion) has nowhere to push
+        if 0 <= one < 64 and not occupied & (1 << one):
+            targets |= 1 << one
+            if (1 << from_sq) & start_rows and not occupied & (1 << (one + step)):
+                targets |= 1 << (one + step)
+        targets &= check_mask
+        if from_sq in pin_rays:
+            targets &= pin_rays[from_sq]
+        if targets:
+            _add_pawn_moves(moves, from_sq, targets)
+        if en_passant is not None and pawn_table[from_sq] & (1 << en_passant):
+            captured_sq = en_passant - step
+            # The capture must answer any check, and removing both pawns
+            # from the rank must not expose the king to a slider
+            if not ((1 << en_passant) | (1 << captured_sq)) & check_mask:
+                continue
+            after = occupied ^ (1 << from_sq) ^ (1 << captured_sq) | (1 << en_passant)
+            if rook_attacks(king_sq, after) & (pieces[enemy_base + ROOK] | enemy_queens):
+                continue
+            if bishop_attacks(king_sq, after) & (pieces[enemy_base + BISHOP] | enemy_queens):
+                continue
+            moves.append(from_sq | (en_passant << 6) | (EN_PASSANT << 12))
+    return moves
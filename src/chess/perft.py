@@ -0,0 +1,217 @@
+"""Perft node counting to check and time the move generator.
+
+Run from ``src``::
+
+    python -m chess.perft                    # reference suite to depth 3
+    python -m chess.perft --depth 4 --min-nps 100000
+    python -m chess.perft --fen "<fen>" --depth 3 --divide
+    python -m chess.perft --depth 4 --workers 1,2,4   # scaling per worker count
+    python -m chess.perft --fen-file positions.txt --depth 3 --workers 4
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from .board import Board
+from .movegen import legal_moves, decode_move
+from .utils import format_position
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Reference node counts by depth, from the Chess Programming Wiki
+POSITIONS = [
+    ("start", START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("promotion", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+class PerftResult(NamedTuple):
+    name: str
+    depth: int
+    nodes: int
+    expected: Optional[int]
+    seconds: float
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.expected is None or self.nodes == self.expected
+
+
+def move_name(move: int) -> str:
+    decoded = decode_move(move)
+    name = format_position(decoded.from_pos) + format_position(decoded.to_pos)
+    return name + decoded.promotion.lower() if decoded.promotion else name
+
+
+def perft(board: Board, depth: int) -> int:
+    if depth == 0:
+        return 1
+    moves = legal_moves(board.bitboards, board.turn, board.castling, board.en_passant)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        undo = board.make_move(*decode_move(move))
+        nodes += perft(board, depth - 1)
+        board.unmake_move(undo)
+    return nodes
+
+
+def divide(board: Board, depth: int) -> Dict[str, int]:
+    """Leaf counts below each root move."""
+    counts: Dict[str, int] = {}
+    for move in legal_moves(board.bitboards, board.turn, board.castling, board.en_passant):
+        undo = board.make_move(*decode_move(move))
+        counts[move_name(move)] = perft(board, depth - 1)
+        board.unmake_move(undo)
+    return counts
+
+
+# A unit of work for a pool worker: the root position as a Board snapshot,
+# the encoded root move to play first (-1 for none) and the remaining depth.
+# Workers rebuild the position from these few bytes instead of unpickling a Board.
+Task = Tuple[bytes, int, int]
+
+
+def _perft_task(task: Task) -> Tuple[int, float]:
+    """Leaf count of one task and the seconds the worker spent on it."""
+    start = time.perf_counter()
+    snapshot, move, depth = task
+    board = Board.from_snapshot(snapshot)
+    if move >= 0:
+        board.make_move(*decode_move(move))
+    return perft(board, depth), time.perf_counter() - start
+
+
+def split_root(fen: str, depth: int) -> List[Task]:
+    board = Board.from_fen(fen)
+    snapshot = board.snapshot()
+    moves = legal_moves(board.bitboards, board.turn, board.castling, board.en_passant)
+    return [(snapshot, move, depth - 1) for move in moves]
+
+
+def parallel_divide(fen: str, depth: int, executor: Executor) -> Dict[str, int]:
+    """divide() with the root moves spread over ``executor``."""
+    tasks = split_root(fen, depth)
+    results = executor.map(_perft_task, tasks)
+    return {move_name(task[1]): nodes for task, (nodes, _) in zip(tasks, results)}
+
+
+def run(name: str, fen: str, depth: int, expected: Optional[int] = None,
+        executor: Optional[Executor] = None) -> PerftResult:
+    start = time.perf_counter()
+    if executor is None or depth < 2:
+        nodes = perft(Board.from_fen(fen), depth)
+    else:
+        nodes = sum(parallel_divide(fen, depth, executor).values())
+    return PerftResult(name, depth, nodes, expected, time.perf_counter() - start)
+
+
+def run_suite(depth: int, executor: Optional[Executor] = None) -> List[PerftResult]:
+    """Every reference position to ``depth`` (or its deepest known count)."""
+    results: List[PerftResult] = []
+    for name, fen, counts in POSITIONS:
+        d = min(depth, len(counts))
+        results.append(run(name, fen, d, counts[d - 1], executor))
+    return results
+
+
+def analyze_positions(fens: Sequence[str], depth: int,
+                      executor: Optional[Executor] = None) -> List[PerftResult]:
+    """Perft each position in a list, one position per task."""
+    tasks = [(Board.from_fen(fen).snapshot(), -1, depth) for fen in fens]
+    if executor is None:
+        results = list(map(_perft_task, tasks))
+    else:
+        results = list(executor.map(_perft_task, tasks, chunksize=max(1, len(tasks) // 64)))
+    # Each position's time is measured in its worker, so overlapping tasks
+    # and pool start-up do not blur it
+    return [PerftResult(fen, depth, nodes, None, seconds)
+            for fen, (nodes, seconds) in zip(fens, results)]
+
+
+def format_result(result: PerftResult) -> str:
+    verdict = "ok" if result.ok else f"FAIL (expected {result.expected})"
+    return (f"{result.name:<12} depth {result.depth}  {result.nodes:>10} nodes  "
+            f"{result.seconds:7.2f}s  {result.nps:>10,.0f} nps  {verdict}")
+
+
+def _execute(args: argparse.Namespace, workers: int) -> List[PerftResult]:
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if args.fen_file:
+            with open(args.fen_file) as handle:
+                fens = [line.strip() for line in handle if line.strip()]
+            return analyze_positions(fens, args.depth, executor)
+        if args.fen:
+            return [run("fen", args.fen, args.depth, executor=executor)]
+        return run_suite(args.depth, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Count move generator leaf nodes.")
+    parser.add_argument("--fen", help="position to search (default: reference suite)")
+    parser.add_argument("--fen-file", help="file with one FEN per line to analyze in bulk")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--divide", action="store_true", help="print counts per root move")
+    parser.add_argument("--min-nps", type=float, default=0.0,
+                        help="fail if any run is slower than this many nodes per second")
+    parser.add_argument("--workers", default="1",
+                        help="worker processes; a comma list such as 1,2,4 reports scaling")
+    args = parser.parse_args(argv)
+    worker_counts = [int(count) for count in args.workers.split(",")]
+
+    if args.divide:
+        fen = args.fen or START_FEN
+        if worker_counts[0] > 1:
+            with ProcessPoolExecutor(max_workers=worker_counts[0]) as executor:
+                counts = parallel_divide(fen, args.depth, executor)
+        else:
+            counts = divide(Board.from_fen(fen), args.depth)
+        for name in sorted(counts):
+            print(f"{name}: {counts[name]}")
+        print(f"\nMoves: {len(counts)}\nNodes: {sum(counts.values())}")
+        return 0
+
+    failed = False
+    baseline: Optional[float] = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results = _execute(args, workers)
+        elapsed = time.perf_counter() - start
+        if len(worker_counts) > 1:
+            print(f"-- {workers} worker{'s' if workers > 1 else ''}")
+        for result in results:
+            print(format_result(result))
+            if not result.ok or result.nps < args.min_nps:
+                failed = True
+        total_nodes = sum(r.nodes for r in results)
+        summary = f"total {total_nodes} nodes in {elapsed:.2f}s ({total_nodes / elapsed if elapsed else 0:,.0f} nps)"
+        if baseline is None:
+            baseline = elapsed
+        elif elapsed:
+            summary += f", {baseline / elapsed:.2f}x the first run"
+        print(summary)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Streaming PGN reader and bulk replay through ``Game``.
+
+Archives are read line by line and games are yielded one at a time, so
+memory stays flat whatever the file size. Replay can fan out over a
+process pool; workers get raw game text in batches and do the parsing.
+
+Run from ``src``::
+
+    python -m chess.pgn games.pgn
+    python -m chess.pgn games.pgn --workers 4 --batch 200
+"""
+import argparse
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import (Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+                    Sequence, Tuple)
+from .game import Game
+
+TAG_PATTERN = re.compile(r'^\[(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+TOKEN_PATTERN = re.compile(r"\{[^}]*\}?|;[^\n]*|\(|\)|\$\d+|[^\s(){};]+")
+MOVE_NUMBER = re.compile(r"^\d+\.+")
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+
+
+class PgnGame(NamedTuple):
+    headers: Dict[str, str]
+    moves: List[str]
+    result: str
+
+
+class ReplayResult(NamedTuple):
+    plies: int
+    # Why replay stopped early, or None if every move was legal
+    error: Optional[str]
+
+
+class ReplayStats(NamedTuple):
+    games: int
+    moves: int
+    seconds: float
+    # (game number from 1, description) for each game with an illegal move
+    errors: List[Tuple[int, str]]
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.seconds if self.seconds else 0.0
+
+
+def split_games(lines: Iterable[str]) -> Iterator[str]:
+    """Raw text of each game; a tag line after movetext starts the next one."""
+    buffer: List[str] = []
+    in_movetext = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("["):
+            if in_movetext:
+                yield "".join(buffer)
+                buffer = []
+                in_movetext = False
+        elif stripped and not stripped.startswith("%"):
+            in_movetext = True
+        buffer.append(line)
+    if in_movetext:
+        yield "".join(buffer)
+
+
+def parse_game(text: str) -> PgnGame:
+    headers: Dict[str, str] = {}
+    movetext: List[str] = []
+    for line in text.splitlines():
+        match = TAG_PATTERN.match(line.strip())
+        if match:
+            headers[match.group(1)] = match.group(2).replace('\\"', '"').replace("\\\\", "\\")
+        elif not line.startswith("%"):
+            movetext.append(line)
+    moves: List[str] = []
+    result = headers.get("Result", "*")
+    depth = 0
+    for token in TOKEN_PATTERN.findall("\n".join(movetext)):
+        # Comments, NAGs and variations are skipped
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(0, depth - 1)
+        elif depth or token[0] in "{;$":
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            token = MOVE_NUMBER.sub("", token)
+            if token:
+                moves.append(token)
+    return PgnGame(headers, moves, result)
+
+
+def read_games(path: str) -> Iterator[PgnGame]:
+    """Games from a PGN file, parsed lazily."""
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        for text in split_games(handle):
+            yield parse_game(text)
+
+
+def replay(pgn: PgnGame) -> ReplayResult:
+    """Play every move through ``Game``, stopping at the first illegal one."""
+    try:
+        if pgn.headers.get("SetUp") == "1" and "FEN" in pgn.headers:
+            game = Game.from_fen(pgn.headers["FEN"])
+        else:
+            game = Game()
+    except ValueError as error:
+        return ReplayResult(0, str(error))
+    for ply, san in enumerate(pgn.moves):
+        if not game.move_san(san):
+            number = game.board.fullmove
+            dots = "." if game.current_turn == "white" else "..."
+            return ReplayResult(ply, f"{number}{dots}{san}: {game.status}")
+    return ReplayResult(len(pgn.moves), None)
+
+
+def _describe(pgn: PgnGame) -> str:
+    white = pgn.headers.get("White", "?")
+    black = pgn.headers.get("Black", "?")
+    return f"{white} - {black}"
+
+
+def _replay_batch(batch: Tuple[int, List[str]]) -> Tuple[int, int, List[Tuple[int, str]]]:
+    start, texts = batch
+    moves = 0
+    errors: List[Tuple[int, str]] = []
+    for offset, text in enumerate(texts):
+        pgn = parse_game(text)
+        result = replay(pgn)
+        moves += result.plies
+        if result.error is not None:
+            errors.append((start + offset, f"{_describe(pgn)}: {result.error}"))
+    return len(texts), moves, errors
+
+
+def _batches(texts: Iterable[str], size: int) -> Iterator[Tuple[int, List[str]]]:
+    batch: List[str] = []
+    start = 1
+    for text in texts:
+        batch.append(text)
+        if len(batch) == size:
+            yield start, batch
+            start += size
+            batch = []
+    if batch:
+        yield start, batch
+
+
+def _bounded_map(executor: Executor, fn: Callable, items: Iterable, limit: int) -> Iterator:
+    # Executor.map submits everything up front; keep only ``limit`` in flight
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def replay_file(path: str, executor: Optional[Executor] = None, batch_size: int = 100,
+                max_pending: int = 8) -> ReplayStats:
+    """Replay every game in ``path``, optionally across ``executor``."""
+    start = time.perf_counter()
+    games = moves = 0
+    errors: List[Tuple[int, str]] = []
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        batches = _batches(split_games(handle), batch_size)
+        if executor is None:
+            results: Iterator = map(_replay_batch, batches)
+        else:
+            results = _bounded_map(executor, _replay_batch, batches, max_pending)
+        for batch_games, batch_moves, batch_errors in results:
+            games += batch_games
+            moves += batch_moves
+            errors.extend(batch_errors)
+    return ReplayStats(games, moves, time.perf_counter() - start, errors)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay PGN games and report illegal moves.")
+    parser.add_argument("path", help="PGN file")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--batch", type=int, default=100, help="games per worker task")
+    args = parser.parse_args(argv)
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            stats = replay_file(args.path, executor, args.batch, max_pending=args.workers * 2)
+    else:
+        stats = replay_file(args.path, batch_size=args.batch)
+    for number, error in stats.errors:
+        print(f"game {number}: {error}")
+    print(f"{stats.games} games, {stats.moves} moves in {stats.seconds:.2f}s "
+          f"({stats.games_per_second:,.1f} games/s, {stats.moves_per_second:,.0f} moves/s), "
+          f"{len(stats.errors)} with illegal moves")
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,33 @@
-from typing import List, Optional, Tuple, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 
 
 class Piece:
-    def __init__(self, color: str) -> None:
-        self.color: str = color
+    """A kind of piece of one color.
+
+    Pieces carry no per-game state, so there is one shared, immutable
+    instance per (class, color): ``Rook("white") is Rook("white")``.
+    """
+
+    __slots__ = ("color",)
+    _instances: Dict[Tuple[type, str], "Piece"] = {}
+
+    def __new__(cls, color: str) -> "Piece":
+        piece = Piece._instances.get((cls, color))
+        if piece is None:
+            piece = object.__new__(cls)
+            object.__setattr__(piece, "color", color)
+            Piece._instances[(cls, color)] = piece
+        return piece
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} pieces are immutable")
+
+    def __reduce__(self) -> Tuple[type, Tuple[str]]:
+        # Unpickling returns the shared instance
+        return type(self), (self.color,)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.color!r})"
 
     def symbol(self) -> str:
         return "?"
@@ -13,14 +37,12 @@ class Piece:
 
 
 class King(Piece):
-    def __init__(self, color: str) -> None:
-        super().__init__(color)
-        self.has_moved: bool = False
+    __slots__ = ()
 
     def symbol(self) -> str:
         return "♔" if self.color == "white" else "♚"
 
-    def valid_moves(self, pos: Tuple[int, int], board: List[List[Any]], can_castle_kingside: bool = True, can_castle_queenside: bool = True) -> List[Tuple[int, int]]:
+    def valid_moves(self, pos: Tuple[int, int], board: List[List[Any]], can_castle_kingside: bool = False, can_castle_queenside: bool = False) -> List[Tuple[int, int]]:
         moves: List[Tuple[int, int]] = []
         x, y = pos
         for dx in [-1, 0, 1]:
@@ -32,21 +54,24 @@ class King(Piece):
                     target = board[nx][ny]
                     if not target or target.color != self.color:
                         moves.append((nx, ny))
-        # Castling
-        if not self.has_moved and x in [0, 7] and y == 4:
+        # Castling; the rights come from the position's castling state
+        if x == (7 if self.color == "white" else 0) and y == 4:
             row = x
+            rook = Rook(self.color)
             # Kingside
-            if can_castle_kingside and isinstance(board[row][7], Rook) and not board[row][7].has_moved:
+            if can_castle_kingside and board[row][7] is rook:
                 if all(board[row][col] is None for col in [5, 6]):
                     moves.append((row, 6))
             # Queenside
-            if can_castle_queenside and isinstance(board[row][0], Rook) and not board[row][0].has_moved:
+            if can_castle_queenside and board[row][0] is rook:
                 if all(board[row][col] is None for col in [1, 2, 3]):
                     moves.append((row, 2))
         return moves
 
 
 class Queen(Piece):
+    __slots__ = ()
+
     def symbol(self) -> str:
         return "♕" if self.color == "white" else "♛"
 
@@ -55,9 +80,7 @@ class Queen(Piece):
 
 
 class Rook(Piece):
-    def __init__(self, color: str) -> None:
-        super().__init__(color)
-        self.has_moved: bool = False
+    __slots__ = ()
 
     def symbol(self) -> str:
         return "♖" if self.color == "white" else "♜"
@@ -85,6 +108,8 @@ class Rook(Piece):
 
 
 class Bishop(Piece):
+    __slots__ = ()
+
     def symbol(self) -> str:
         return "♗" if self.color == "white" else "♝"
 
@@ -111,6 +136,8 @@ class Bishop(Piece):
 
 
 class Knight(Piece):
+    __slots__ = ()
+
     def symbol(self) -> str:
         return "♘" if self.color == "white" else "♞"
 
@@ -127,6 +154,8 @@ class Knight(Piece):
 
 
 class Pawn(Piece):
+    __slots__ = ()
+
     def symbol(self) -> str:
         return "♙" if self.color == "white" else "♟"
 
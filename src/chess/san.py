@@ -0,0 +1,110 @@
+"""Standard Algebraic Notation (SAN) for encoded moves.
+
+Both directions work on a Board plus its legal move list, so callers that
+already generated the moves (``Game`` does, through the position cache)
+pay for generation once.
+"""
+import re
+from typing import List, Optional
+from .board import Board
+from .bitboard import PAWN
+from .movegen import (legal_moves, decode_move, CASTLE_KINGSIDE, CASTLE_QUEENSIDE,
+                      PROMOTE_KNIGHT, PROMOTIONS)
+from .utils import format_position
+
+PIECE_LETTERS = "PNBRQK"
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQnbrq]))?$")
+PROMOTION_FLAGS = {letter: flag for flag, letter in PROMOTIONS.items()}
+
+
+def _square_name(sq: int) -> str:
+    return format_position((sq >> 3, sq & 7))
+
+
+def _piece_type(board: Board, sq: int) -> int:
+    return (board.squares[sq] - 1) % 6
+
+
+def move_to_san(board: Board, move: int, moves: Optional[List[int]] = None) -> str:
+    """SAN for ``move``, which must be legal on ``board``; adds + or #."""
+    if moves is None:
+        moves = legal_moves(board.bitboards, board.turn, board.castling, board.en_passant)
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+    flag = move >> 12
+    if flag == CASTLE_KINGSIDE:
+        san = "O-O"
+    elif flag == CASTLE_QUEENSIDE:
+        san = "O-O-O"
+    else:
+        piece_type = _piece_type(board, from_sq)
+        capture = bool(board.squares[to_sq]) or (piece_type == PAWN and from_sq & 7 != to_sq & 7)
+        if piece_type == PAWN:
+            san = _square_name(from_sq)[0] + "x" if capture else ""
+        else:
+            san = PIECE_LETTERS[piece_type]
+            # Disambiguate by file, then rank, then both
+            rivals = [other & 63 for other in moves
+                      if (other >> 6) & 63 == to_sq and other & 63 != from_sq
+                      and _piece_type(board, other & 63) == piece_type]
+            if rivals:
+                if all(sq & 7 != from_sq & 7 for sq in rivals):
+                    san += _square_name(from_sq)[0]
+                elif all(sq >> 3 != from_sq >> 3 for sq in rivals):
+                    san += _square_name(from_sq)[1]
+                else:
+                    san += _square_name(from_sq)
+            if capture:
+                san += "x"
+        san += _square_name(to_sq)
+        if flag >= PROMOTE_KNIGHT:
+            san += "=" + PROMOTIONS[flag]
+
+    undo = board.make_move(*decode_move(move))
+    try:
+        if board.in_check(board.turn):
+            replies = legal_moves(board.bitboards, board.turn, board.castling, board.en_passant)
+            san += "+" if replies else "#"
+    finally:
+        board.unmake_move(undo)
+    return san
+
+
+def parse_san(board: Board, san: str, moves: Optional[List[int]] = None) -> int:
+    """The legal move on ``board`` written as ``san``; ValueError if none or ambiguous."""
+    if moves is None:
+        moves = legal_moves(board.bitboards, board.turn, board.castling, board.en_passant)
+    text = san.rstrip("+#!?")
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        flag = CASTLE_KINGSIDE if len(text) == 3 else CASTLE_QUEENSIDE
+        for move in moves:
+            if move >> 12 == flag:
+                return move
+        raise ValueError(f"Illegal move: {san}")
+    match = SAN_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f"Not a SAN move: {san!r}")
+    letter, from_file, from_rank, target, promotion = match.groups()
+    piece_type = PIECE_LETTERS.index(letter) if letter else PAWN
+    to_sq = (8 - int(target[1])) * 8 + "abcdefgh".index(target[0])
+    promotion_flag = PROMOTION_FLAGS[promotion.upper()] if promotion else None
+    found = []
+    for move in moves:
+        from_sq = move & 63
+        if (move >> 6) & 63 != to_sq or _piece_type(board, from_sq) != piece_type:
+            continue
+        if from_file and "abcdefgh"[from_sq & 7] != from_file:
+            continue
+        if from_rank and str(8 - (from_sq >> 3)) != from_rank:
+            continue
+        flag = move >> 12
+        if flag >= PROMOTE_KNIGHT and flag != promotion_flag:
+            continue
+        if flag == CASTLE_KINGSIDE or flag == CASTLE_QUEENSIDE:
+            continue
+        found.append(move)
+    if not found:
+        raise ValueError(f"Illegal move: {san}")
+    if len(found) > 1:
+        raise ValueError(f"Ambiguous move: {san}")
+    return found[0]
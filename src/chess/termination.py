@@ -0,0 +1,127 @@
+"""Draws that depend on the game so far rather than the position alone.
+
+A ``GameTracker`` follows a game move by move: how often each position
+has occurred, and how many of each piece are on the board. With the
+board's halfmove clock that decides repetitions, the move-count rules
+and insufficient material in constant time.
+
+As in the FIDE rules, threefold repetition and the fifty-move rule only
+let a player claim a draw; the game ends by itself at fivefold repetition,
+after seventy-five moves, or with material that cannot mate.
+
+Positions are counted by Zobrist hash, without the en passant file when
+no en passant capture is legal, so a double pawn push that gives no such
+capture still repeats the same placement reached another way.
+"""
+from typing import Dict, List, Optional
+from .bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, PAWN_ATTACKS
+from .board import Board, MoveUndo, PROMOTION_TYPES
+from .movegen import EN_PASSANT, legal_moves
+from .zobrist import EN_PASSANT_KEYS
+
+# Square colors; row 0 is rank 8 and a8 is a light square
+LIGHT_SQUARES = sum(1 << sq for sq in range(64) if (sq // 8 + sq % 8) % 2 == 0)
+DARK_SQUARES = ((1 << 64) - 1) ^ LIGHT_SQUARES
+
+# Draws a player may claim
+REPETITION = "repetition"
+FIFTY_MOVES = "fifty-move rule"
+# Draws that end the game by themselves
+FIVEFOLD_REPETITION = "fivefold repetition"
+SEVENTY_FIVE_MOVES = "seventy-five-move rule"
+INSUFFICIENT_MATERIAL = "insufficient material"
+
+
+def repetition_key(board: Board) -> int:
+    """``board.hash`` with the en passant file only if the capture is legal."""
+    target = board.en_passant
+    if target is None:
+        return board.hash
+    pieces = board.bitboards.pieces
+    # Pawns of the side to move that attack the target square
+    if PAWN_ATTACKS[board.turn ^ 1][target] & pieces[board.turn * 6 + PAWN]:
+        # Rare enough to settle pins and checks with a full move generation
+        moves = legal_moves(board.bitboards, board.turn, board.castling, target)
+        if any(move >> 12 == EN_PASSANT for move in moves):
+            return board.hash
+    return board.hash ^ EN_PASSANT_KEYS[target & 7]
+
+
+class GameTracker:
+    """Position occurrence counts and the material signature of a game."""
+
+    __slots__ = ("counts", "keys", "material")
+
+    def __init__(self, board: Board) -> None:
+        # Repetition key of each position reached, one per ply; the last is
+        # the current position, so status checks and pop never recompute it
+        self.keys: List[int] = [repetition_key(board)]
+        self.counts: Dict[int, int] = {self.keys[0]: 1}
+        # Pieces on the board per piece code, as in ``Board.squares``; 0 unused
+        self.material: List[int] = [0] * 13
+        for code in board.squares:
+            if code:
+                self.material[code] += 1
+
+    def push(self, board: Board, undo: MoveUndo, promotion: Optional[str]) -> None:
+        """Count the position ``board.make_move`` just returned ``undo`` for."""
+        key = repetition_key(board)
+        self.keys.append(key)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        material = self.material
+        if undo.captured:
+            material[undo.captured] -= 1
+        if promotion:
+            material[undo.piece] -= 1
+            material[undo.piece - PAWN + PROMOTION_TYPES[promotion]] += 1
+
+    def pop(self, board: Board, undo: MoveUndo, promotion: Optional[str]) -> None:
+        """Forget the current position; call before ``board.unmake_move(undo)``."""
+        key = self.keys.pop()
+        count = self.counts[key] - 1
+        if count:
+            self.counts[key] = count
+        else:
+            del self.counts[key]
+        material = self.material
+        if undo.captured:
+            material[undo.captured] += 1
+        if promotion:
+            material[undo.piece] += 1
+            material[undo.piece - PAWN + PROMOTION_TYPES[promotion]] -= 1
+
+    def draw(self, board: Board) -> Optional[str]:
+        """Why the game is drawn at the current position without a claim,
+        or None; mate is checked elsewhere."""
+        if board.halfmove >= 150:
+            return SEVENTY_FIVE_MOVES
+        if self.counts[self.keys[-1]] >= 5:
+            return FIVEFOLD_REPETITION
+        if self.insufficient_material(board):
+            return INSUFFICIENT_MATERIAL
+        return None
+
+    def claimable(self, board: Board) -> Optional[str]:
+        """The draw either player may claim at the current position, or None."""
+        if board.halfmove >= 100:
+            return FIFTY_MOVES
+        if self.counts[self.keys[-1]] >= 3:
+            return REPETITION
+        return None
+
+    def insufficient_material(self, board: Board) -> bool:
+        """Neither side can mate: bare kings plus one minor piece, or only
+        bishops that all stand on squares of one color."""
+        material = self.material
+        for piece_type in (PAWN, ROOK, QUEEN):
+            if material[1 + piece_type] or material[7 + piece_type]:
+                return False
+        knights = material[1 + KNIGHT] + material[7 + KNIGHT]
+        bishops = material[1 + BISHOP] + material[7 + BISHOP]
+        if knights + bishops <= 1:
+            return True
+        if knights:
+            return False
+        pieces = board.bitboards.pieces
+        placed = pieces[BISHOP] | pieces[6 + BISHOP]
+        return not placed & LIGHT_SQUARES or not placed & DARK_SQUARES
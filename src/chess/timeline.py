@@ -0,0 +1,149 @@
+"""Checkpointed game history for jumping to any ply.
+
+A ``Timeline`` keeps a game's packed moves (as in ``SavedGame``) plus a
+38-byte ``Board.snapshot()`` every ``interval`` plies, so the position at
+any ply is one snapshot load and at most ``interval - 1`` moves replayed,
+however long the game. Keeping it in step with a game only replays the
+moves added since the last checkpoint.
+
+Run from ``src`` to time jumps against replaying from the start::
+
+    python -m chess.timeline --lengths 50,200,1000,5000 --interval 16
+"""
+import argparse
+import random
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+from .bitboard import PAWN
+from .board import Board, SNAPSHOT
+from .game import Game, SavedGame
+from .instrument import latency_summary
+from .movegen import LegalMove, decode_move, legal_moves
+
+INTERVAL = 16
+
+
+class Timeline:
+    def __init__(self, start: Optional[bytes] = None, interval: int = INTERVAL) -> None:
+        if interval < 1:
+            raise ValueError("interval must be at least 1")
+        self.interval = interval
+        self._reset(start)
+
+    def _reset(self, start: Optional[bytes]) -> None:
+        # Snapshot of the start position, or None for the initial position
+        self.start = start
+        # Encoded moves, 16 bits each, as in ``SavedGame.moves``
+        self.moves = b""
+        # Snapshots after 0, interval, 2 * interval, ... plies, back to back
+        self.checkpoints = bytearray(start if start is not None else Board().snapshot())
+
+    @classmethod
+    def from_saved(cls, saved: SavedGame, interval: int = INTERVAL) -> "Timeline":
+        timeline = cls(saved.start, interval)
+        timeline.update(saved)
+        return timeline
+
+    def __len__(self) -> int:
+        """Plies played; positions run from 0 to ``len(self)``."""
+        return len(self.moves) // 2
+
+    def update(self, saved: SavedGame) -> None:
+        """Follow ``saved``, keeping the checkpoints of the moves both share."""
+        if saved.start != self.start:
+            self._reset(saved.start)
+        old = self.moves
+        shared = 0
+        limit = min(len(old), len(saved.moves))
+        while shared < limit and old[shared:shared + 2] == saved.moves[shared:shared + 2]:
+            shared += 2
+        kept = shared // 2 // self.interval + 1
+        del self.checkpoints[kept * SNAPSHOT.size:]
+        self.moves = saved.moves
+        board = self._checkpoint(kept - 1)
+        for ply in range((kept - 1) * self.interval, len(self)):
+            board.make_move(*self.move(ply))
+            if (ply + 1) % self.interval == 0:
+                self.checkpoints += board.snapshot()
+
+    def move(self, ply: int) -> LegalMove:
+        """The move played from the position at ``ply``."""
+        return decode_move(int.from_bytes(self.moves[2 * ply:2 * ply + 2], "little"))
+
+    def board(self, ply: int) -> Board:
+        """The position after ``ply`` moves; ``last_move`` is set unless ``ply`` is 0."""
+        if not 0 <= ply <= len(self):
+            raise IndexError(f"Ply {ply} outside 0..{len(self)}")
+        # Step back one checkpoint when ``ply`` sits on one, so the last move is known
+        index = (ply - 1) // self.interval if ply else 0
+        board = self._checkpoint(index)
+        for i in range(index * self.interval, ply):
+            board.make_move(*self.move(i))
+        return board
+
+    def _checkpoint(self, index: int) -> Board:
+        offset = index * SNAPSHOT.size
+        return Board.from_snapshot(bytes(self.checkpoints[offset:offset + SNAPSHOT.size]))
+
+    def nbytes(self) -> int:
+        return len(self.moves) + len(self.checkpoints)
+
+
+def shuffle_game(length: int, seed: int = 1) -> SavedGame:
+    """A legal game of ``length`` plies that avoids captures and pawn moves
+    where it can, so it rarely ends; draws by rule are not applied."""
+    rng = random.Random(seed)
+    while True:
+        board = Board()
+        codes: List[int] = []
+        while len(codes) < length:
+            moves = legal_moves(board.bitboards, board.turn, board.castling, board.en_passant)
+            if not moves:
+                break
+            quiet = [move for move in moves
+                     if not board.squares[(move >> 6) & 63]
+                     and (board.squares[move & 63] - 1) % 6 != PAWN] or moves
+            code = rng.choice(quiet)
+            board.make_move(*decode_move(code))
+            codes.append(code)
+        if len(codes) == length:
+            return SavedGame(None, struct.pack(f"<{length}H", *codes), b"", "", False)
+        seed += 1
+        rng = random.Random(seed)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time jumps to random plies.")
+    parser.add_argument("--lengths", default="50,200,1000,5000", help="game lengths in plies")
+    parser.add_argument("--interval", type=int, default=INTERVAL)
+    parser.add_argument("--jumps", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    print("plies   timeline p50    p99   replay p50    p99   build    bytes")
+    for length in (int(value) for value in args.lengths.split(",")):
+        saved = shuffle_game(length)
+        start = time.perf_counter()
+        timeline = Timeline.from_saved(saved, args.interval)
+        build = time.perf_counter() - start
+        rng = random.Random(length)
+        samples: Dict[str, List[float]] = {"timeline": [], "replay": []}
+        for _ in range(args.jumps):
+            ply = rng.randint(0, length)
+            start = time.perf_counter()
+            timeline.board(ply)
+            samples["timeline"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            Game.restore(saved._replace(moves=saved.moves[:2 * ply]))
+            samples["replay"].append(time.perf_counter() - start)
+        stats = latency_summary(samples)
+        jump, replay = stats["timeline"], stats["replay"]
+        print(f"{length:>5} {jump['p50_ms']:>11.3f}ms {jump['p99_ms']:>6.3f} "
+              f"{replay['p50_ms']:>10.3f}ms {replay['p99_ms']:>6.3f} "
+              f"{build * 1000:>6.1f}ms {timeline.nbytes():>8,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
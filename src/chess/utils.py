@@ -12,3 +12,9 @@ def parse_position(pos_str: str) -> Optional[Tuple[int, int]]:
         if 0 <= x < 8 and 0 <= y < 8:
             return (x, y)
     return None
+
+
+def format_position(pos: Tuple[int, int]) -> str:
+    """Format board indices as chess algebraic notation."""
+    x, y = pos
+    return "abcdefgh"[y] + str(8 - x)
@@ -0,0 +1,36 @@
+"""64-bit Zobrist keys for identifying positions."""
+import random
+from typing import List, Optional
+from .bitboard import BitboardPosition, iter_bits
+
+# Fixed seed so hashes are stable across processes and restarts
+_rng = random.Random(0x5EED_C0DE)
+
+# Indexed by (color * 6 + piece_type) * 64 + square
+PIECE_KEYS: List[int] = [_rng.getrandbits(64) for _ in range(12 * 64)]
+SIDE_KEY: int = _rng.getrandbits(64)
+_CASTLING_BITS: List[int] = [_rng.getrandbits(64) for _ in range(4)]
+# Indexed by the 4-bit castling rights mask
+CASTLING_KEYS: List[int] = []
+for _rights in range(16):
+    _key = 0
+    for _bit in range(4):
+        if _rights & (1 << _bit):
+            _key ^= _CASTLING_BITS[_bit]
+    CASTLING_KEYS.append(_key)
+EN_PASSANT_KEYS: List[int] = [_rng.getrandbits(64) for _ in range(8)]
+
+
+def compute_hash(bitboards: BitboardPosition, turn: int, castling: int,
+                 en_passant: Optional[int]) -> int:
+    """Hash a position from scratch; Board keeps it up to date incrementally."""
+    key = 0
+    for index, bb in enumerate(bitboards.pieces):
+        for sq in iter_bits(bb):
+            key ^= PIECE_KEYS[index * 64 + sq]
+    if turn:
+        key ^= SIDE_KEY
+    key ^= CASTLING_KEYS[castling]
+    if en_passant is not None:
+        key ^= EN_PASSANT_KEYS[en_passant & 7]
+    return key
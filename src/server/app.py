@@ -0,0 +1,302 @@
+"""Headless asyncio game server: JSON over HTTP plus WebSocket updates.
+
+Routes::
+
+    GET    /health                  server and registry counters
+    POST   /games                   new game; body {"fen": ...} optional
+    GET    /games/<id>              game state
+    DELETE /games/<id>
+    GET    /games/<id>/moves        legal moves in coordinate notation
+    POST   /games/<id>/moves        {"move": "e2e4"} or {"san": "Nf3"}
+    POST   /games/<id>/engine       computer move; {"time": 1.0, "depth": 64}, time
+                                    up to 10 seconds, depth 1 to 64
+    POST   /games/<id>/draw         claim a draw by repetition or the fifty-move rule
+    GET    /games/<id>/board.png
+    GET    /games/<id>/ws           WebSocket: state on every change; send
+                                    {"move": ...} or {"san": ...} to play
+
+Game logic runs on the event loop (a move is well under a millisecond);
+searches go to the analysis process pool and rendering to a thread pool.
+
+Run from ``src``::
+
+    python -m server.app --port 8765
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Set
+from chess.analysis import AnalysisService
+from chess.game import Game
+from ui.render import placement_key, render_png
+from .games import GameRegistry, RegistryFull, game_state, legal_move_texts, move_text, parse_move
+from .protocol import (CLOSE, PING, PONG, TEXT, ProtocolError, Request, Response,
+                       accept_websocket, encode_frame, encode_response, is_websocket,
+                       read_frame, read_request)
+
+# Subscribers whose socket buffers this much unsent data are dropped
+MAX_BACKLOG = 256 * 1024
+MAX_SEARCH_TIME = 10.0
+MAX_SEARCH_DEPTH = 64
+
+log = logging.getLogger(__name__)
+
+
+class GameServer:
+    def __init__(self, registry: Optional[GameRegistry] = None, search_workers: int = 2,
+                 render_threads: int = 2) -> None:
+        self.registry = registry or GameRegistry()
+        self.search_workers = search_workers
+        # The process pool starts on the first engine request
+        self.analysis: Optional[AnalysisService] = None
+        self.render_pool = ThreadPoolExecutor(render_threads)
+        self.subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self.requests = 0
+
+    def close(self) -> None:
+        if self.analysis is not None:
+            self.analysis.shutdown()
+        self.render_pool.shutdown(wait=False)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ProtocolError as error:
+                    writer.write(encode_response(Response.error(error.status, str(error)), False))
+                    break
+                if request is None:
+                    break
+                self.requests += 1
+                if is_websocket(request):
+                    await self.serve_websocket(request, reader, writer)
+                    break
+                response = await self.dispatch(request)
+                writer.write(encode_response(response, request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request: Request) -> Response:
+        parts = [part for part in request.path.split("/") if part]
+        try:
+            if parts == ["health"]:
+                return Response.json({**self.registry.stats(), "requests": self.requests,
+                                      "subscribers": sum(map(len, self.subscribers.values()))})
+            if parts == ["games"]:
+                if request.method != "POST":
+                    return Response.error(405, "Use POST to create a game")
+                return self.create(request.json())
+            if len(parts) < 2 or parts[0] != "games":
+                return Response.error(404, "No such route")
+            game_id = parts[1]
+            action = "/".join(parts[2:])
+            route = (request.method, action)
+            if route == ("GET", ""):
+                return Response.json(game_state(game_id, self.registry.get(game_id)))
+            if route == ("DELETE", ""):
+                self.registry.delete(game_id)
+                return Response(204)
+            if route == ("GET", "moves"):
+                return Response.json({"moves": legal_move_texts(self.registry.get(game_id))})
+            if route == ("POST", "moves"):
+                return self.play(game_id, request.json())
+            if route == ("POST", "draw"):
+                return self.claim_draw(game_id)
+            if route == ("POST", "engine"):
+                return await self.engine_move(game_id, request.json())
+            if route == ("GET", "board.png"):
+                return await self.board_image(game_id)
+            return Response.error(404, "No such route")
+        except KeyError:
+            return Response.error(404, "No such game")
+        except ProtocolError as error:
+            return Response.error(error.status, str(error))
+        except ValueError as error:
+            return Response.error(400, str(error))
+        except Exception:
+            # Answer rather than drop the connection; the traceback goes to the log
+            log.exception("%s %s failed", request.method, request.path)
+            return Response.error(500, "Internal server error")
+
+    def create(self, body: Dict[str, Any]) -> Response:
+        try:
+            game_id = self.registry.create(body.get("fen"))
+        except ValueError as error:
+            return Response.error(400, str(error))
+        except RegistryFull as error:
+            return Response.error(503, str(error))
+        return Response.json(game_state(game_id, self.registry.get(game_id)), 201)
+
+    def play(self, game_id: str, body: Dict[str, Any]) -> Response:
+        game = self.registry.get(game_id)
+        if not apply_move(game, body):
+            return Response.json({"error": game.status, **game_state(game_id, game)}, 409)
+        state = game_state(game_id, game)
+        self.publish(game_id, state)
+        return Response.json(state)
+
+    def claim_draw(self, game_id: str) -> Response:
+        game = self.registry.get(game_id)
+        if not game.claim_draw():
+            return Response.json({"error": game.status, **game_state(game_id, game)}, 409)
+        state = game_state(game_id, game)
+        self.publish(game_id, state)
+        return Response.json(state)
+
+    async def engine_move(self, game_id: str, body: Dict[str, Any]) -> Response:
+        game = self.registry.get(game_id)
+        if game.promoting or not legal_move_texts(game):
+            return Response.error(409, "No move to search for")
+        try:
+            time_limit = float(body.get("time", 1.0))
+            depth = float(body.get("depth", MAX_SEARCH_DEPTH))
+        except (TypeError, ValueError):
+            raise ProtocolError(400, "time and depth must be numbers")
+        # json.loads accepts NaN and Infinity, and a NaN deadline never passes
+        if not math.isfinite(time_limit) or not 0 < time_limit <= MAX_SEARCH_TIME:
+            raise ProtocolError(400, f"time must be above 0 and at most {MAX_SEARCH_TIME}")
+        if not math.isfinite(depth) or not 1 <= depth <= MAX_SEARCH_DEPTH:
+            raise ProtocolError(400, f"depth must be from 1 to {MAX_SEARCH_DEPTH}")
+        if self.analysis is None:
+            self.analysis = AnalysisService(workers=self.search_workers)
+        key = game.board.hash
+        future = self.analysis.search(game.board, time_limit, int(depth))
+        if future is None:
+            return Response.error(503, "Too many searches queued; try again shortly")
+        analysis = await asyncio.wrap_future(future)
+        # The game may have been played or evicted while the search ran
+        game = self.registry.get(game_id)
+        result = analysis.result
+        if game.board.hash != key or result.move is None:
+            return Response.error(409, "Position changed during the search")
+        if game.move(result.move.from_pos, result.move.to_pos) and game.promoting:
+            game.promote(result.move.promotion)
+        state = game_state(game_id, game)
+        self.publish(game_id, state)
+        return Response.json({**state, "engine": {
+            "move": move_text(result.move), "score": result.score, "depth": result.depth,
+            "nodes": result.nodes, "book": result.book}})
+
+    async def board_image(self, game_id: str) -> Response:
+        game = self.registry.get(game_id)
+        last_move = game.board.last_move
+        highlights = tuple(x * 8 + y for x, y in last_move) if last_move else ()
+        png = await asyncio.get_running_loop().run_in_executor(
+            self.render_pool, render_png, placement_key(game.get_board_symbols()), highlights)
+        return Response(200, png, "image/png")
+
+    def publish(self, game_id: str, state: Dict[str, Any]) -> None:
+        sockets = self.subscribers.get(game_id)
+        if not sockets:
+            return
+        frame = encode_frame(json.dumps({"type": "state", **state}).encode())
+        for writer in list(sockets):
+            if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                sockets.discard(writer)
+                writer.close()
+            else:
+                writer.write(frame)
+
+    async def serve_websocket(self, request: Request, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> None:
+        parts = [part for part in request.path.split("/") if part]
+        if len(parts) != 3 or parts[0] != "games" or parts[2] != "ws" or parts[1] not in self.registry:
+            writer.write(encode_response(Response.error(404, "No such game"), False))
+            return
+        game_id = parts[1]
+        writer.write(accept_websocket(request))
+
+        def send(data: Dict[str, Any]) -> None:
+            writer.write(encode_frame(json.dumps(data).encode()))
+
+        send({"type": "state", **game_state(game_id, self.registry.get(game_id))})
+        sockets = self.subscribers.setdefault(game_id, set())
+        sockets.add(writer)
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == CLOSE:
+                    writer.write(encode_frame(payload[:2], CLOSE))
+                    break
+                if opcode == PING:
+                    writer.write(encode_frame(payload, PONG))
+                elif opcode == TEXT:
+                    try:
+                        message = json.loads(payload)
+                        game = self.registry.get(game_id)
+                    except ValueError:
+                        send({"type": "error", "error": "Messages must be JSON"})
+                        continue
+                    except KeyError:
+                        send({"type": "error", "error": "No such game"})
+                        break
+                    if not isinstance(message, dict) or not apply_move(game, message):
+                        send({"type": "error", "error": game.status})
+                    else:
+                        self.publish(game_id, game_state(game_id, game))
+                await writer.drain()
+        except ProtocolError:
+            pass
+        finally:
+            sockets.discard(writer)
+            if not sockets:
+                self.subscribers.pop(game_id, None)
+
+
+def apply_move(game: Game, body: Dict[str, Any]) -> bool:
+    """Play {"move": "e2e4"} or {"san": "Nf3"}; False with ``game.status`` set if refused."""
+    if "san" in body:
+        return game.move_san(str(body["san"]))
+    parsed = parse_move(str(body.get("move", "")))
+    if parsed is None:
+        game.status = "Invalid input. Use coordinates like e2e4 or e7e8q."
+        return False
+    from_pos, to_pos, promotion = parsed
+    if not game.move(from_pos, to_pos):
+        return False
+    if game.promoting:
+        game.promote(promotion or "Q")
+    return True
+
+
+async def serve(host: str, port: int, server: GameServer) -> None:
+    listener = await asyncio.start_server(server.handle, host, port, backlog=1024)
+    address = listener.sockets[0].getsockname()
+    print(f"Serving on http://{address[0]}:{address[1]}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve games over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--live", type=int, default=1024,
+                        help="games kept unpacked; the rest are stored packed")
+    parser.add_argument("--capacity", type=int, default=100_000, help="maximum games held")
+    parser.add_argument("--search-workers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    server = GameServer(GameRegistry(args.live, args.capacity), args.search_workers)
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
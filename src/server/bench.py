@@ -0,0 +1,198 @@
+"""Throughput and latency of the game server under N concurrent games.
+
+Starts ``server.app`` in a subprocess (or targets ``--url``), then every
+simulated player opens a keep-alive connection, creates a game and plays
+random legal moves, optionally watching its game over a WebSocket.
+
+Run from ``src``::
+
+    python -m server.bench --games 200 --moves 40
+    python -m server.bench --games 500 --subscribe --json bench.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+from chess.instrument import latency_summary
+from .protocol import read_frame
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "Client":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None
+                      ) -> Tuple[int, Dict[str, Any]]:
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\n"
+                          f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ", 2)[1])
+        length = 0
+        for line in head[1:]:
+            name, _, value = line.partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length) if length else b""
+        return status, json.loads(data) if data else {}
+
+    async def websocket(self, path: str) -> None:
+        """Upgrade this connection; afterwards read frames from ``self.reader``."""
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\nUpgrade: websocket\r\n"
+                          f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                          "Sec-WebSocket-Version: 13\r\n\r\n".encode())
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        if not head.startswith(b"HTTP/1.1 101"):
+            raise ConnectionError(f"WebSocket refused: {head.splitlines()[0]!r}")
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def player(host: str, port: int, moves: int, subscribe: bool, rng: random.Random,
+                 samples: Dict[str, List[float]]) -> int:
+    """Play one game; returns the number of moves made."""
+    def timed(name: str, start: float) -> None:
+        samples.setdefault(name, []).append(time.perf_counter() - start)
+
+    client = await Client.connect(host, port)
+    watcher: Optional[Client] = None
+    try:
+        start = time.perf_counter()
+        status, state = await client.request("POST", "/games")
+        timed("create", start)
+        if status != 201:
+            raise ConnectionError(f"create failed with {status}: {state}")
+        game = f"/games/{state['id']}"
+        if subscribe:
+            watcher = await Client.connect(host, port)
+            await watcher.websocket(game + "/ws")
+            await read_frame(watcher.reader)
+        played = 0
+        for _ in range(moves):
+            start = time.perf_counter()
+            _, legal = await client.request("GET", game + "/moves")
+            timed("legal_moves", start)
+            if not legal["moves"]:
+                break
+            start = time.perf_counter()
+            status, _ = await client.request("POST", game + "/moves",
+                                             {"move": rng.choice(legal["moves"])})
+            timed("move", start)
+            if status != 200:
+                raise ConnectionError(f"move refused with {status}")
+            if watcher is not None:
+                await read_frame(watcher.reader)
+                timed("push", start)
+            played += 1
+        start = time.perf_counter()
+        await client.request("GET", game)
+        timed("state", start)
+        return played
+    finally:
+        client.close()
+        if watcher is not None:
+            watcher.close()
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+async def run(host: str, port: int, games: int, moves: int, subscribe: bool,
+              seed: int) -> Dict[str, Any]:
+    samples: Dict[str, List[float]] = {}
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    played = await asyncio.gather(*(
+        player(host, port, moves, subscribe, random.Random(rng.random()), samples)
+        for _ in range(games)))
+    elapsed = time.perf_counter() - start
+    requests = sum(len(samples[name]) for name in samples if name != "push")
+    return {"games": games, "moves": sum(played), "seconds": elapsed,
+            "requests_per_second": requests / elapsed, "moves_per_second": sum(played) / elapsed,
+            "latency": latency_summary(samples)}
+
+
+def start_server() -> Tuple[subprocess.Popen, int]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen([sys.executable, "-m", "server.app", "--port", str(port)],
+                               cwd=src, stdout=subprocess.PIPE, text=True)
+    assert process.stdout is not None
+    line = process.stdout.readline()
+    if not line.startswith("Serving"):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line!r}")
+    return process, port
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the game server.")
+    parser.add_argument("--games", type=int, default=100, help="concurrent games")
+    parser.add_argument("--moves", type=int, default=40, help="moves per game at most")
+    parser.add_argument("--subscribe", action="store_true",
+                        help="watch each game over a WebSocket and time the pushes")
+    parser.add_argument("--url", help="existing server, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    else:
+        process, port = start_server()
+        host = "127.0.0.1"
+    try:
+        report = asyncio.run(run(host, port, args.games, args.moves, args.subscribe, args.seed))
+        if process is not None:
+            report["server_peak_rss_kb"] = rss_kb(process.pid)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(f"{report['games']} games, {report['moves']} moves in {report['seconds']:.2f}s "
+          f"({report['requests_per_second']:,.0f} requests/s, "
+          f"{report['moves_per_second']:,.0f} moves/s)")
+    for name, stats in report["latency"].items():
+        print(f"{name:<12} {stats['count']:>7}  p50 {stats['p50_ms']:7.2f}ms  "
+              f"p95 {stats['p95_ms']:7.2f}ms  p99 {stats['p99_ms']:7.2f}ms  "
+              f"max {stats['max_ms']:7.2f}ms")
+    if report.get("server_peak_rss_kb"):
+        print(f"server peak RSS {report['server_peak_rss_kb'] / 1024:.1f} MB")
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Games held by the server, packed while idle and live while played."""
+import secrets
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from chess.game import Game, SavedGame
+from chess.movegen import LegalMove
+from chess.utils import format_position, parse_position
+
+
+class RegistryFull(Exception):
+    pass
+
+
+def move_text(move: LegalMove) -> str:
+    """Coordinate notation, e.g. e2e4 or e7e8q."""
+    text = format_position(move.from_pos) + format_position(move.to_pos)
+    return text + move.promotion.lower() if move.promotion else text
+
+
+def parse_move(text: str) -> Optional[Tuple[Tuple[int, int], Tuple[int, int], Optional[str]]]:
+    """(from, to, promotion) from coordinate notation; None if malformed."""
+    from_pos = parse_position(text[:2])
+    to_pos = parse_position(text[2:4])
+    promotion = text[4:].upper() or None
+    if from_pos is None or to_pos is None or promotion not in (None, "Q", "R", "B", "N"):
+        return None
+    return from_pos, to_pos, promotion
+
+
+def legal_move_texts(game: Game) -> List[str]:
+    # Mid-promotion the side to move has no moves until the piece is chosen
+    return [] if game.promoting else [move_text(move) for move in game.legal_moves()]
+
+
+def game_state(game_id: str, game: Game) -> Dict[str, Any]:
+    last_move = game.board.last_move
+    return {
+        "id": game_id,
+        "fen": game.to_fen(),
+        "turn": game.current_turn,
+        "status": game.status,
+        "promoting": game.promoting is not None,
+        "ply": len(game.undo_stack),
+        "last_move": format_position(last_move[0]) + format_position(last_move[1]) if last_move else None,
+        "result": game.result,
+        "draw_claim": game.draw_claim,
+    }
+
+
+class GameRegistry:
+    """Every game by id.
+
+    The ``live`` most recently used games are kept as ``Game`` objects (a
+    few KB each); the rest as ``SavedGame`` (about 200 bytes plus 2 per
+    ply) and are rebuilt on their next request.
+    """
+
+    def __init__(self, live: int = 1024, capacity: int = 100_000) -> None:
+        self.live_capacity = live
+        self.capacity = capacity
+        self.live: "OrderedDict[str, Game]" = OrderedDict()
+        self.saved: Dict[str, SavedGame] = {}
+        self.restores = 0
+
+    def __len__(self) -> int:
+        return len(self.live) + len(self.saved)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self.live or game_id in self.saved
+
+    def create(self, fen: Optional[str] = None) -> str:
+        """Start a game, from ``fen`` if given; ValueError for a bad FEN."""
+        if len(self) >= self.capacity:
+            raise RegistryFull(f"Server holds its maximum of {self.capacity} games")
+        game = Game.from_fen(fen) if fen else Game()
+        game_id = secrets.token_urlsafe(9)
+        self._admit(game_id, game)
+        return game_id
+
+    def get(self, game_id: str) -> Game:
+        """The live game; KeyError if there is none with this id."""
+        game = self.live.get(game_id)
+        if game is not None:
+            self.live.move_to_end(game_id)
+            return game
+        game = Game.restore(self.saved.pop(game_id))
+        self.restores += 1
+        self._admit(game_id, game)
+        return game
+
+    def delete(self, game_id: str) -> bool:
+        return (self.live.pop(game_id, None) or self.saved.pop(game_id, None)) is not None
+
+    def _admit(self, game_id: str, game: Game) -> None:
+        self.live[game_id] = game
+        while len(self.live) > self.live_capacity:
+            idle_id, idle = self.live.popitem(last=False)
+            self.saved[idle_id] = idle.save()
+
+    def stats(self) -> Dict[str, int]:
+        return {"games": len(self), "live": len(self.live), "saved": len(self.saved),
+                "restores": self.restores}
@@ -0,0 +1,151 @@
+"""Just enough HTTP/1.1 and WebSocket (RFC 6455) over asyncio streams.
+
+Requests are read with a size cap and answered with a Content-Length body;
+keep-alive is the default. WebSocket support covers text, ping and close
+frames from the client and unfragmented text frames to it.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+MAX_HEADER = 16 * 1024
+MAX_BODY = 64 * 1024
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request",
+           404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+           413: "Payload Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+TEXT, CLOSE, PING, PONG = 0x1, 0x8, 0x9, 0xA
+
+
+class ProtocolError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise ProtocolError(400, "Body is not valid JSON")
+        if not isinstance(data, dict):
+            raise ProtocolError(400, "Body must be a JSON object")
+        return data
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+
+class Response(NamedTuple):
+    status: int
+    body: bytes = b""
+    content_type: str = "application/json"
+
+    @classmethod
+    def json(cls, data: Any, status: int = 200) -> "Response":
+        return cls(status, json.dumps(data, separators=(",", ":")).encode())
+
+    @classmethod
+    def error(cls, status: int, message: str) -> "Response":
+        return cls.json({"error": message}, status)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """The next request on the connection, or None once the client is gone."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise ProtocolError(413, "Headers too large")
+    if len(head) > MAX_HEADER:
+        raise ProtocolError(413, "Headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise ProtocolError(400, "Malformed request line")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    # Digits only: int() would also take a sign, spaces and underscores
+    length_text = headers.get("content-length", "0")
+    if not (length_text.isascii() and length_text.isdigit()):
+        raise ProtocolError(400, "Bad Content-Length")
+    length = int(length_text)
+    if length > MAX_BODY:
+        raise ProtocolError(413, "Body too large")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target.split("?", 1)[0], headers, body)
+
+
+def encode_response(response: Response, keep_alive: bool = True) -> bytes:
+    head = (f"HTTP/1.1 {response.status} {REASONS.get(response.status, 'Unknown')}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + response.body
+
+
+def is_websocket(request: Request) -> bool:
+    return (request.headers.get("upgrade", "").lower() == "websocket"
+            and "sec-websocket-key" in request.headers)
+
+
+def accept_websocket(request: Request) -> bytes:
+    """The 101 response completing the WebSocket handshake."""
+    digest = hashlib.sha1(request.headers["sec-websocket-key"].encode() + WS_GUID).digest()
+    return (b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+            b"Connection: Upgrade\r\nSec-WebSocket-Accept: "
+            + base64.b64encode(digest) + b"\r\n\r\n")
+
+
+def encode_frame(payload: bytes, opcode: int = TEXT) -> bytes:
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """(opcode, payload) of the next client frame; continuations are merged."""
+    payload = b""
+    opcode = 0
+    while True:
+        first, second = await reader.readexactly(2)
+        opcode = opcode or first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        if len(payload) + length > MAX_BODY:
+            raise ProtocolError(413, "Frame too large")
+        mask = await reader.readexactly(4) if second & 0x80 else b""
+        data = await reader.readexactly(length)
+        if mask and length:
+            # XOR the whole payload at once as one big integer
+            key = (mask * (length // 4 + 1))[:length]
+            data = (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+        payload += data
+        if first & 0x80:
+            return opcode, payload
@@ -0,0 +1,127 @@
+"""Cold-start latency of a new app worker process.
+
+Starts fresh interpreters one after another, each pointed at the same
+``CHESS_CACHE_DIR``, and times what a new Streamlit worker does before its
+first page appears: import Streamlit, import the app script, render the
+start position, warm the renderer up as the app does once the first page
+is out, then render a position nothing has cached. The first run
+finds the disk cache empty; the rest reuse what it stored.
+
+Run from ``src``::
+
+    python -m ui.coldstart --runs 5
+    python -m ui.coldstart --runs 9 --importtime 15 --json coldstart.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+PHASES = ("streamlit", "app", "first_render", "warm_up", "other_render")
+
+
+def child() -> Dict[str, float]:
+    """Run in the fresh process; milliseconds per phase."""
+    times: Dict[str, float] = {}
+    start = time.perf_counter()
+    import streamlit
+    times["streamlit"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    import ui.streamlit_ui
+    times["app"] = time.perf_counter() - start
+
+    from chess.game import Game
+    from ui.render import placement_key, render_png, warm_up
+    game = Game()
+    start = time.perf_counter()
+    render_png(placement_key(game.get_board_symbols()))
+    times["first_render"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    warm_up()
+    times["warm_up"] = time.perf_counter() - start
+
+    game.move((6, 4), (4, 4))
+    start = time.perf_counter()
+    render_png(placement_key(game.get_board_symbols()), (52, 36))
+    times["other_render"] = time.perf_counter() - start
+    return {name: seconds * 1000 for name, seconds in times.items()}
+
+
+def spawn(cache_dir: str, flags: Sequence[str] = ()) -> Tuple[Dict[str, float], str]:
+    """One worker's timings, and its stderr."""
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, CHESS_CACHE_DIR=cache_dir)
+    process = subprocess.run([sys.executable, *flags, "-m", "ui.coldstart", "--child"],
+                             cwd=src, env=env, capture_output=True, text=True, check=True)
+    return json.loads(process.stdout.splitlines()[-1]), process.stderr
+
+
+def slowest_imports(stderr: str, count: int) -> List[Tuple[str, float]]:
+    """Top-level modules by cumulative import time from ``-X importtime``."""
+    modules: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            modules[name.strip()] = int(cumulative) / 1000
+    return sorted(modules.items(), key=lambda item: -item[1])[:count]
+
+
+def run(runs: int, cache_dir: str, importtime: int) -> Dict[str, Any]:
+    samples = [spawn(cache_dir)[0] for _ in range(runs)]
+    report: Dict[str, Any] = {
+        "runs": runs,
+        "cold": samples[0],
+        "warm": {name: statistics.median(sample[name] for sample in samples[1:])
+                 for name in PHASES} if runs > 1 else None,
+        "samples": samples,
+    }
+    if importtime:
+        report["slowest_imports"] = slowest_imports(spawn(cache_dir, ["-X", "importtime"])[1],
+                                                    importtime)
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time the cold start of an app worker.")
+    parser.add_argument("--runs", type=int, default=5, help="processes; the first starts cold")
+    parser.add_argument("--cache-dir", help="disk cache to use; a new empty one by default")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="also list the N slowest top-level imports")
+    parser.add_argument("--json", help="write the report as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(child()))
+        return 0
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+    if args.cache_dir:
+        report = run(args.runs, args.cache_dir, args.importtime)
+    else:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            report = run(args.runs, cache_dir, args.importtime)
+
+    print(f"{'':<6}" + "".join(f"{name:>14}" for name in PHASES))
+    for label in ("cold", "warm"):
+        if report[label]:
+            print(f"{label:<6}" + "".join(f"{report[label][name]:>12.1f}ms" for name in PHASES))
+    for name, ms in report.get("slowest_imports", []):
+        print(f"{ms:>9.1f}ms  {name}")
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
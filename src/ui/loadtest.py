@@ -0,0 +1,218 @@
+"""Load test of the page's game and rendering path with many sessions.
+
+Each simulated session repeats what one Streamlit page run does: restore
+its saved game, apply one action (a move, undo, redo or restart), render
+the board and save the game again. Sessions run on a thread pool, as the
+server runs scripts, so they contend for the GIL the same way.
+
+Run from ``src``::
+
+    python -m ui.loadtest --sessions 200 --actions 50 --threads 8
+    python -m ui.loadtest --pgn games.pgn --json new.json --csv new.csv
+    python -m ui.loadtest --baseline old.json      # compare with an earlier run
+"""
+import argparse
+import csv
+import json
+import platform
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+from chess import instrument
+from chess.game import Game, SavedGame
+from chess.pgn import read_games
+from ui.render import placement_key, render_png
+
+# Share of random actions that are not moves
+UNDO_RATE = 0.08
+REDO_RATE = 0.04
+RESTART_RATE = 0.01
+
+
+class Session:
+    def __init__(self, seed: int, script: Optional[List[str]] = None) -> None:
+        self.saved: Optional[SavedGame] = None
+        self.random = random.Random(seed)
+        # SAN moves to play in order; random legal moves if None
+        self.script = script
+
+
+class Recorder:
+    """Latency samples per operation, shared by every worker thread."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = {}
+        self.lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+
+def pick_action(session: Session, game: Game) -> str:
+    if game.promoting:
+        return "promote"
+    if session.script is not None:
+        ply = len(game.undo_stack)
+        return "move" if ply < len(session.script) else "restart"
+    if next(game.legal_moves(), None) is None:
+        return "restart"
+    roll = session.random.random()
+    if roll < RESTART_RATE:
+        return "restart"
+    if roll < RESTART_RATE + UNDO_RATE and game.undo_stack:
+        return "undo"
+    if roll < RESTART_RATE + UNDO_RATE + REDO_RATE and game.redo_stack:
+        return "redo"
+    return "move"
+
+
+def interact(session: Session, recorder: Recorder) -> None:
+    """One page run for ``session``."""
+    started = time.perf_counter()
+    game = Game.restore(session.saved) if session.saved is not None else Game()
+    now = time.perf_counter()
+    recorder.add("restore", now - started)
+
+    action = pick_action(session, game)
+    start = now
+    if action == "move" and session.script is not None:
+        game.move_san(session.script[len(game.undo_stack)])
+    elif action == "move":
+        move = session.random.choice(list(game.legal_moves()))
+        game.move(move.from_pos, move.to_pos)
+    elif action == "promote":
+        game.promote(session.random.choice("QRBN"))
+    elif action == "undo":
+        game.undo()
+    elif action == "redo":
+        game.redo()
+    else:
+        game = Game()
+    now = time.perf_counter()
+    recorder.add(action, now - start)
+
+    start = now
+    last_move = game.board.last_move
+    highlights = tuple(x * 8 + y for x, y in last_move) if last_move else ()
+    render_png(placement_key(game.get_board_symbols()), highlights)
+    now = time.perf_counter()
+    recorder.add("render", now - start)
+
+    start = now
+    session.saved = game.save()
+    now = time.perf_counter()
+    recorder.add("save", now - start)
+    recorder.add("interaction", now - started)
+
+
+def run_session(session: Session, actions: int, recorder: Recorder) -> None:
+    for _ in range(actions):
+        interact(session, recorder)
+
+
+def load_scripts(path: str, limit: int) -> List[List[str]]:
+    scripts = []
+    for pgn in read_games(path):
+        if "FEN" not in pgn.headers and pgn.moves:
+            scripts.append(pgn.moves)
+            if len(scripts) == limit:
+                break
+    if not scripts:
+        raise ValueError(f"No games from the initial position in {path}")
+    return scripts
+
+
+def run(sessions: int, actions: int, threads: int, seed: int = 1,
+        scripts: Optional[List[List[str]]] = None) -> Dict[str, Any]:
+    """Drive ``sessions`` simulated players for ``actions`` page runs each."""
+    players = [Session(seed + i, scripts[i % len(scripts)] if scripts else None)
+               for i in range(sessions)]
+    recorder = Recorder()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(run_session, player, actions, recorder)
+                       for player in players]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    interactions = len(recorder.samples.get("interaction", []))
+    return {
+        "config": {"sessions": sessions, "actions": actions, "threads": threads, "seed": seed,
+                   "scripted": scripts is not None},
+        "python": platform.python_version(),
+        "time": time.time(),
+        "seconds": elapsed,
+        "interactions_per_second": interactions / elapsed if elapsed else 0.0,
+        # Linux reports kilobytes
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "latency": instrument.latency_summary(recorder.samples),
+        "caches": {name: stats() for name, stats in sorted(instrument.caches.items())},
+    }
+
+
+def write_csv(report: Dict[str, Any], path: str) -> None:
+    fields = ["operation", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    with open(path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fields)
+        writer.writeheader()
+        for name, stats in report["latency"].items():
+            writer.writerow({"operation": name, **{key: round(value, 4) if isinstance(value, float)
+                                                   else value for key, value in stats.items()}})
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """p95 and throughput changes against an earlier report."""
+    lines = []
+    for name, stats in report["latency"].items():
+        old = baseline["latency"].get(name)
+        if old and old["p95_ms"]:
+            change = stats["p95_ms"] / old["p95_ms"] - 1
+            lines.append(f"{name:<12} p95 {old['p95_ms']:8.3f} -> {stats['p95_ms']:8.3f}ms "
+                         f"({change:+.0%})")
+    old_rate = baseline.get("interactions_per_second")
+    if old_rate:
+        lines.append(f"throughput {old_rate:,.0f} -> {report['interactions_per_second']:,.0f} "
+                     f"interactions/s ({report['interactions_per_second'] / old_rate - 1:+.0%})")
+    return lines
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the game and rendering path.")
+    parser.add_argument("--sessions", type=int, default=100, help="simulated players")
+    parser.add_argument("--actions", type=int, default=40, help="page runs per player")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent script threads")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--pgn", help="replay games from this file instead of random moves")
+    parser.add_argument("--json", help="write the report as JSON")
+    parser.add_argument("--csv", help="write per-operation latencies as CSV")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    scripts = load_scripts(args.pgn, args.sessions) if args.pgn else None
+    report = run(args.sessions, args.actions, args.threads, args.seed, scripts)
+    interactions = report["latency"]["interaction"]["count"]
+    print(f"{args.sessions} sessions, {interactions} interactions in {report['seconds']:.2f}s "
+          f"({report['interactions_per_second']:,.0f}/s), peak RSS "
+          f"{report['peak_rss_kb'] / 1024:.1f} MB")
+    for name, stats in report["latency"].items():
+        print(f"{name:<12} {stats['count']:>7}  p50 {stats['p50_ms']:7.3f}ms  "
+              f"p95 {stats['p95_ms']:7.3f}ms  p99 {stats['p99_ms']:7.3f}ms  "
+              f"max {stats['max_ms']:7.3f}ms")
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+    if args.csv:
+        write_csv(report, args.csv)
+    if args.baseline:
+        with open(args.baseline) as handle:
+            for line in compare(report, json.load(handle)):
+                print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,100 +1,347 @@
+import time
+_import_started = time.perf_counter()
 import streamlit as st
-from typing import List, Dict, Any, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
+from chess import instrument
 from chess.game import Game
-from chess.utils import parse_position
-from PIL import Image, ImageDraw, ImageFont
-import io
+from chess.book import BOOK_PATH, OpeningBook
+from chess.san import move_to_san
+from chess.engine import SearchResult, STRENGTHS, MATE_BOUND
+from chess.movegen import LegalMove
+from chess.utils import parse_position, format_position
+from ui.render import COLORS, HIGHLIGHT, PIECE_GLYPHS, placement_key, render_png, warm_up
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import contextlib
+import json
 import os
+import uuid
 
-# Unicode symbols for pieces
-PIECE_SYMBOLS = {
-    "♔": "♔", "♕": "♕", "♖": "♖", "♗": "♗", "♘": "♘", "♙": "♙",
-    "♚": "♚", "♛": "♛", "♜": "♜", "♝": "♝", "♞": "♞", "♟": "♟",
-    ".": ""
-}
-
-
-def draw_chessboard(board: List[List[str]]) -> Image.Image:
-    square_size = 50  # Reduced size to fit better
-    board_size = 8 * square_size
-    colors = [(240, 217, 181), (181, 136, 99)]  # light, dark
-    img = Image.new("RGB", (board_size, board_size), colors[0])
-    draw = ImageDraw.Draw(img)
-
-    # Try to use a system font that supports chess symbols
-    font = None
-    font_paths = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "C:/Windows/Fonts/DejaVuSans.ttf",
-        "C:/Windows/Fonts/Arial Unicode MS.ttf",
-        "C:/Windows/Fonts/seguisym.ttf",
-        "DejaVuSans.ttf",
-        "Arial Unicode MS.ttf",
-        "Segoe UI Symbol.ttf"
+# Imported on first use: the process pool, the game store and the timeline
+# are not needed to serve a first page
+if TYPE_CHECKING:
+    from chess.analysis import AnalysisService
+    from chess.gamedb import GameStore
+    from chess.timeline import Timeline
+
+# Budget for the background evaluation bar and best-move hint
+HINT_TIME_LIMIT = 1.0
+HINT_MAX_DEPTH = 64
+# Game store behind the Explore panel (built with python -m chess.gamedb)
+GAME_DB = os.environ.get("CHESS_GAME_DB", "data/games")
+EXPLORE_ROWS = 10
+# JSON-lines file that gets a performance snapshot after every measured run
+PERF_LOG = os.environ.get("CHESS_PERF_LOG")
+# Replay frames rendered ahead on each side of the one shown
+PREFETCH_PLIES = 2
+
+
+@st.cache_resource
+def get_analysis_service() -> "AnalysisService":
+    # One worker pool per server process, shared by every session
+    from chess.analysis import AnalysisService
+    return AnalysisService()
+
+
+@st.cache_resource
+def get_game_store() -> "GameStore":
+    # Memory-mapped once per server process
+    from chess.gamedb import GameStore
+    return GameStore(GAME_DB)
+
+
+@st.cache_resource
+def get_opening_book() -> OpeningBook:
+    return OpeningBook(BOOK_PATH)
+
+
+@st.cache_resource
+def get_render_pool() -> ThreadPoolExecutor:
+    # Warms the shared render cache with replay frames next to the one shown
+    return ThreadPoolExecutor(1)
+
+
+def move_text(move: LegalMove) -> str:
+    return format_position(move.from_pos) + format_position(move.to_pos)
+
+
+def white_score(result: SearchResult, color: str) -> int:
+    # Engine scores are for the side that searched; show white's view
+    return result.score if color == "white" else -result.score
+
+
+def format_score(result: SearchResult, color: str) -> str:
+    score = white_score(result, color)
+    if abs(score) > MATE_BOUND:
+        return "mate" if score > 0 else "-mate"
+    return f"{score / 100:+.2f}"
+
+
+def apply_engine_move(game: Game, result: SearchResult) -> None:
+    if game.move(result.move.from_pos, result.move.to_pos) and game.promoting:
+        game.promote(result.move.promotion)
+
+
+@st.fragment(run_every=0.5)
+def await_computer_move(session_id: str, key: int, queued: bool) -> None:
+    # Rerun the page once the move is ready (or to retry a full queue)
+    if not queued or get_analysis_service().poll(session_id, key, "move") is not None:
+        st.rerun()
+    st.caption("Computer is thinking...")
+
+
+@st.fragment(run_every=1.0)
+def analysis_panel(session_id: str, key: int, color: str) -> None:
+    result = get_analysis_service().poll(session_id, key, "hint")
+    if result is None or result.move is None:
+        st.caption("Analysing...")
+        return
+    score = max(-1000, min(1000, white_score(result, color)))
+    st.progress((score + 1000) / 2000, text=f"Evaluation (white): {format_score(result, color)}")
+    st.caption(f"Best move: {move_text(result.move)} | depth {result.depth} "
+               f"| {result.nps:,.0f} nodes/s")
+
+
+def explore_panel(game: Game) -> None:
+    store = get_game_store()
+    if not len(store):
+        st.caption(f"No game database at {GAME_DB!r}; build one with "
+                   "python -m chess.gamedb build <file.pgn> <path>.")
+        return
+    with instrument.timer("gamedb.lookup"):
+        stats = store.lookup(game.board)
+    if not stats.moves:
+        st.caption("No stored game continues from this position.")
+        return
+    total = sum(count for _, count in stats.moves)
+    st.caption(f"{stats.games} stored games reached this position")
+    rows = stats.moves[:EXPLORE_ROWS]
+    st.dataframe({
+        "Move": [move_to_san(game.board, move) for move, _ in rows],
+        "Games": [count for _, count in rows],
+        "Share": [f"{100 * count / total:.1f}%" for _, count in rows],
+    }, hide_index=True)
+
+
+@lru_cache(maxsize=1)
+def board_css() -> str:
+    # Square colors for the click board's buttons, keyed by square
+    rules = [
+        'div[class*="st-key-sq-"] button {width: 100%; aspect-ratio: 1; padding: 0; '
+        'border: none; border-radius: 0; font-size: 2rem; line-height: 1; color: black;}',
+        'div[class*="st-key-sq-"] button[kind="primary"] {background: rgb%s;}' % (HIGHLIGHT[:3],),
+        '[data-testid="stHorizontalBlock"]:has(div[class*="st-key-sq-"]) {gap: 0;}',
     ]
-    for font_path in font_paths:
-        try:
-            font = ImageFont.truetype(font_path, 36)
-            if not font.getmask("♔").getbbox():
-                font = None
-                continue
-            break
-        except:
-            font = None
-            continue
-    if font is None:
-        font = ImageFont.load_default()
-
-    for i in range(8):
-        for j in range(8):
-            x0 = j * square_size
-            y0 = i * square_size
-            color = colors[(i + j) % 2]
-            draw.rectangle([x0, y0, x0 + square_size,
-                           y0 + square_size], fill=color)
-            symbol = board[i][j]
-            if symbol in PIECE_SYMBOLS and PIECE_SYMBOLS[symbol]:
-                bbox = draw.textbbox((0, 0), PIECE_SYMBOLS[symbol], font=font)
-                w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
-                draw.text(
-                    (x0 + (square_size - w) / 2, y0 + (square_size - h) / 2 - 2),
-                    PIECE_SYMBOLS[symbol],
-                    fill=(0, 0, 0),
-                    font=font
-                )
-
-    # Draw coordinates
-    coord_font = None
-    for font_path in font_paths:
-        try:
-            coord_font = ImageFont.truetype(font_path, 12)
-            if not coord_font.getmask("8").getbbox():
-                coord_font = None
-                continue
-            break
-        except:
-            coord_font = None
-            continue
-    if coord_font is None:
-        coord_font = ImageFont.load_default()
-
-    for i in range(8):
-        draw.text((1, i * square_size + 1), str(8 - i),
-                  fill=(0, 0, 0), font=coord_font)
-        draw.text((i * square_size + square_size - 10, board_size - 15),
-                  "abcdefgh"[i], fill=(0, 0, 0), font=coord_font)
-
-    return img
+    for sq in range(64):
+        rules.append(".st-key-sq-%d button {background: rgb%s;}" % (sq, COLORS[(sq // 8 + sq % 8) % 2]))
+    return "<style>" + "\n".join(rules) + "</style>"
+
+
+def click_square(sq: int, targets: Dict[int, Tuple[int, ...]], key: int) -> None:
+    selected = st.session_state.get("selected")
+    if selected is not None and sq in targets.get(selected, ()):
+        # Played on the next full run, if the position is still ``key``
+        st.session_state.pending_move = (key, selected, sq)
+        st.session_state.selected = None
+    else:
+        st.session_state.selected = sq if sq in targets and sq != selected else None
+
+
+@st.fragment
+def click_board(placement: str, targets: Dict[int, Tuple[int, ...]], key: int,
+                highlights: Tuple[int, ...], flipped: bool) -> None:
+    """The board as 64 buttons: click a piece, then one of its highlighted squares.
+
+    Selecting reruns only this fragment, from the position's cached move table.
+    """
+    if "pending_move" in st.session_state:
+        st.rerun()
+    selected = st.session_state.get("selected")
+    if selected not in targets:
+        selected = None
+    marked = set(targets[selected]) | {selected} if selected is not None else set()
+    st.markdown(board_css(), unsafe_allow_html=True)
+    if highlights:
+        st.markdown("<style>%s {box-shadow: inset 0 0 0 4px rgb%s;}</style>" % (
+            ", ".join(".st-key-sq-%d button" % sq for sq in highlights), HIGHLIGHT[:3]),
+            unsafe_allow_html=True)
+    order = range(63, -1, -1) if flipped else range(64)
+    for row in range(8):
+        for col, sq in zip(st.columns(8), order[row * 8:row * 8 + 8]):
+            symbol = placement[sq]
+            col.button(symbol if symbol in PIECE_GLYPHS else "\u2003", key=f"sq-{sq}",
+                       type="primary" if sq in marked else "secondary",
+                       disabled=not targets, on_click=click_square, args=(sq, targets, key))
+
+
+def replay_frame(timeline: "Timeline", ply: int, flipped: bool) -> Tuple[str, Tuple[int, ...], bool]:
+    """``render_png`` arguments for the position after ``ply`` moves."""
+    board = timeline.board(ply)
+    last_move = board.last_move
+    highlights = tuple(x * 8 + y for x, y in last_move) if last_move else ()
+    return placement_key(board.get_board_symbols()), highlights, flipped
+
+
+@st.fragment
+def replay_panel(timeline: "Timeline", flipped: bool) -> None:
+    """Scrub through the game; moving the slider reruns only this panel."""
+    plies = len(timeline)
+    if not plies:
+        st.caption("No moves to replay yet.")
+        return
+    ply = st.slider("Ply", 0, plies, plies)
+    st.image(render_png(*replay_frame(timeline, ply, flipped)), use_container_width=False)
+    st.caption(f"After {move_text(timeline.move(ply - 1))}" if ply else "Start position")
+    pool = get_render_pool()
+    for near in range(max(0, ply - PREFETCH_PLIES), min(plies, ply + PREFETCH_PLIES) + 1):
+        if near != ply:
+            pool.submit(render_png, *replay_frame(timeline, near, flipped))
+
+
+def toggle_measurement() -> None:
+    # Counters are process-wide, so this switches them for every session
+    instrument.enable(st.session_state.measure)
+
+
+def performance_panel() -> None:
+    data = instrument.snapshot()
+    with st.expander("Performance"):
+        timers = data["timers"]
+        if timers:
+            st.dataframe({
+                "Timer": list(timers),
+                "Calls": [t["calls"] for t in timers.values()],
+                "Mean (ms)": [round(t["mean_us"] / 1000, 3) for t in timers.values()],
+                "Max (ms)": [round(t["max_ms"], 3) for t in timers.values()],
+                "Total (ms)": [round(t["total_ms"], 1) for t in timers.values()],
+            }, hide_index=True)
+        counters = data["counters"]
+        if counters:
+            st.dataframe({"Counter": list(counters), "Count": list(counters.values())},
+                         hide_index=True)
+        caches = data["caches"]
+        st.dataframe({
+            "Cache": list(caches),
+            "Hit rate": [f"{c['hit_rate']:.1%}" for c in caches.values()],
+            "Hits": [c["hits"] for c in caches.values()],
+            "Misses": [c["misses"] for c in caches.values()],
+            "Size": [c["size"] for c in caches.values()],
+        }, hide_index=True)
+        report = st.session_state.get("profile_report")
+        if report == instrument.PROFILER_BUSY:
+            st.caption("Profile of the last interaction: profiler busy, another "
+                       "session's interaction was being profiled")
+        elif report:
+            st.caption("Profile of the last interaction")
+            st.code(report)
+        download_col, reset_col = st.columns(2)
+        download_col.download_button("Download JSON", json.dumps(data, indent=2),
+                                     file_name="chess-performance.json",
+                                     mime="application/json", use_container_width=True)
+        if reset_col.button("Reset counters", use_container_width=True):
+            instrument.reset()
+            st.session_state.profile_report = None
+            st.rerun()
+
+
+def restart_game() -> None:
+    get_analysis_service().cancel(st.session_state.session_id)
+    st.session_state.saved_game = None
+    st.session_state.last_search = None
+
+
+def load_position() -> None:
+    """Start over from the FEN typed in; an impossible one is reported instead."""
+    try:
+        game = Game.from_fen(st.session_state.fen_input.strip())
+    except ValueError as error:
+        st.session_state.fen_error = str(error)
+        return
+    restart_game()
+    st.session_state.saved_game = game.save()
+    st.session_state.fen_error = None
 
 
 def main():
+    global _first_run
+    started = time.perf_counter()
     st.set_page_config(layout="wide", page_title="Chess Game")
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+        st.session_state.saved_game = None
+        st.session_state.last_search = None
+    # The profile setting comes from the previous interaction's widgets
+    profile = (instrument.Profile() if instrument.enabled and st.session_state.get("profile")
+               else None)
+    # Sessions hold the packed game; the Game object lives for one run
+    saved = st.session_state.saved_game
+    with instrument.timer("game.restore"):
+        game = Game.restore(saved) if saved is not None else Game()
+    try:
+        with instrument.timer("ui.run"), profile or contextlib.nullcontext():
+            play(game)
+    finally:
+        st.session_state.saved_game = game.save()
+        if profile is not None:
+            st.session_state.profile_report = profile.report()
+        first_run = _first_run
+        if first_run:
+            # Cold-start cost of this process, logged even when measuring is off
+            _first_run = False
+            instrument.record("startup.first_run", time.perf_counter() - started)
+            get_render_pool().submit(warm_up)
+        if PERF_LOG and (instrument.enabled or first_run):
+            instrument.dump(PERF_LOG)
+    if st.session_state.get("measure"):
+        performance_panel()
+
 
-    if "game" not in st.session_state:
-        st.session_state.game = Game()
-        st.session_state.move_history = []
+def play(game: Game) -> None:
+    session_id = st.session_state.session_id
 
-    game = st.session_state.game
+    # Opponent settings come first so the computer can move before drawing
+    with st.sidebar:
+        st.subheader("Opponent")
+        mode = st.radio("Mode", ["Two players", "Play vs computer"])
+        vs_computer = mode == "Play vs computer"
+        if vs_computer:
+            engine_color = st.selectbox("Computer plays", ["black", "white"],
+                                        format_func=str.capitalize)
+            strength = st.select_slider("Strength", options=list(STRENGTHS), value="Medium")
+            max_depth, default_time = STRENGTHS[strength]
+            time_limit = st.slider("Seconds per move", 0.5, 10.0, default_time, 0.5)
+        show_analysis = st.checkbox("Show analysis", help="Evaluation bar and best-move hint")
+        explore = st.checkbox("Explore", help="Moves played from this position in stored games")
+        click_to_move = st.checkbox("Click to move", value=True,
+                                    help="Pick a piece, then one of its highlighted squares")
+        replay = st.checkbox("Replay", help="Step back through the moves played")
+        if st.checkbox("Performance", value=instrument.enabled, key="measure",
+                       on_change=toggle_measurement, help="Time and count the hot paths"):
+            st.checkbox("Profile each interaction", key="profile",
+                        help="cProfile capture of every page run")
+
+    # A move picked on the click board during a fragment rerun
+    pending = st.session_state.pop("pending_move", None)
+    if pending is not None and pending[0] == game.board.hash:
+        game.move(divmod(pending[1], 8), divmod(pending[2], 8))
+
+    # The search runs in the shared pool; the page renders while it thinks
+    can_move = not game.promoting and next(game.legal_moves(), None) is not None
+    computer_thinking = False
+    queued = True
+    if vs_computer and game.current_turn == engine_color and can_move:
+        result = get_analysis_service().poll(session_id, game.board.hash, "move")
+        if result is None:
+            computer_thinking = True
+            queued = get_analysis_service().submit(session_id, game.board, time_limit, max_depth,
+                                                   "move")
+        else:
+            apply_engine_move(game, result)
+            st.session_state.last_search = result
+            can_move = not game.promoting and next(game.legal_moves(), None) is not None
+    if show_analysis and can_move:
+        get_analysis_service().submit(session_id, game.board, HINT_TIME_LIMIT, HINT_MAX_DEPTH,
+                                      "hint")
 
     # Main layout in two columns with centering
     col_left, col1, col2, col_right1, col_right2 = st.columns([1, 3, 2, 1, 1])
@@ -103,12 +350,26 @@ def main():
         st.title("♟️ Chess Game")
         st.write(f"**Turn: {game.current_turn.capitalize()}**")
 
-        # Draw the chessboard
+        # Draw the chessboard; unchanged boards come from the render cache
         board = game.get_board_symbols()
-        img = draw_chessboard(board)
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        st.image(buf.getvalue(), use_container_width=False)
+        last_move = game.board.last_move
+        highlights = tuple(x * 8 + y for x, y in last_move) if last_move else ()
+        flipped = vs_computer and engine_color == "white"
+        if click_to_move:
+            players_turn = not (vs_computer and game.current_turn == engine_color)
+            click_board(placement_key(board), game.targets() if players_turn else {},
+                        game.board.hash, highlights, flipped)
+        else:
+            st.image(render_png(placement_key(board), highlights, flipped), use_container_width=False)
+        if replay:
+            # Kept per session and brought up to date from the game's moves
+            timeline = st.session_state.get("timeline")
+            if timeline is None:
+                from chess.timeline import Timeline
+                timeline = st.session_state.timeline = Timeline.from_saved(game.save())
+            else:
+                timeline.update(game.save())
+            replay_panel(timeline, flipped)
 
     with col2:
         st.subheader("Game Info")
@@ -116,13 +377,41 @@ def main():
         # Status and controls in a compact format
         st.write("**Status:**", game.status)
 
+        result = st.session_state.last_search
+        if vs_computer and result is not None and result.move is not None and result.book:
+            st.caption(f"Computer: {move_text(result.move)} (book move)")
+        elif vs_computer and result is not None and result.move is not None:
+            pv = " ".join(move_text(m) for m in result.pv)
+            st.caption(
+                f"Computer: {move_text(result.move)} "
+                f"| eval {format_score(result, engine_color)} | depth {result.depth} "
+                f"| {result.nps:,.0f} nodes/s | PV {pv}")
+        with instrument.timer("book.lookup"):
+            book_moves = get_opening_book().moves(game.board) if can_move else []
+        if book_moves:
+            total = sum(book_move.weight for book_move in book_moves)
+            st.caption("Book: " + ", ".join(
+                f"{move_to_san(game.board, move)} {100 * weight / total:.0f}%"
+                for move, weight in book_moves[:6]))
+        elif get_opening_book().error:
+            st.caption(get_opening_book().error)
+        if computer_thinking:
+            await_computer_move(session_id, game.board.hash, queued)
+        if show_analysis and can_move:
+            analysis_panel(session_id, game.board.hash, game.current_turn)
+        if explore and not game.promoting:
+            explore_panel(game)
+
         # Move input section
         st.subheader("Make Move")
 
-        if game.promoting:
+        if computer_thinking:
+            st.caption("Waiting for the computer's move.")
+        elif game.promoting:
             piece_type = st.selectbox("Promote pawn to:", ["Q", "R", "B", "N"])
             if st.button("Promote"):
                 game.promote(piece_type)
+                st.rerun()
         else:
             with st.form("move_form", clear_on_submit=True):
                 from_square = st.text_input("From (e.g. e2):", max_chars=2)
@@ -133,41 +422,45 @@ def main():
                     from_pos = parse_position(from_square.strip())
                     to_pos = parse_position(to_square.strip())
                     if from_pos and to_pos:
-                        success = game.move(from_pos, to_pos)
-                        if success:
-                            # Store move in history
-                            st.session_state.move_history.append({
-                                'from': from_pos,
-                                'to': to_pos,
-                                'piece': game.board.grid[to_pos[0]][to_pos[1]],
-                                'captured': None,  # Simplified - would need to track captured pieces
-                                'turn': game.current_turn
-                            })
+                        if game.move(from_pos, to_pos):
                             st.rerun()
                     else:
                         game.status = "Invalid input. Use format like e2, e4."
 
-        # Reverse move button
-        if st.button("↩️ Reverse Last Move", use_container_width=True, disabled=len(st.session_state.move_history) == 0):
-            if st.session_state.move_history:
-                # Remove last move from history
-                last_move = st.session_state.move_history.pop()
-
-                # Reset the game state
-                st.session_state.game = Game()
-
-                # Replay all moves except the last one
-                for move in st.session_state.move_history:
-                    st.session_state.game.move(move['from'], move['to'])
+        # Undo/redo; on the player's turn a step also covers the computer's reply
+        plies = 2 if vs_computer and game.current_turn != engine_color and not game.promoting else 1
+        undo_col, redo_col = st.columns(2)
+        if undo_col.button("↩️ Reverse Last Move", use_container_width=True,
+                           disabled=len(game.undo_stack) < plies):
+            get_analysis_service().cancel(session_id)
+            for _ in range(plies):
+                game.undo()
+            st.session_state.last_search = None
+            st.rerun()
+        if redo_col.button("↪️ Redo Move", use_container_width=True,
+                           disabled=len(game.redo_stack) < plies):
+            get_analysis_service().cancel(session_id)
+            for _ in range(plies):
+                game.redo()
+            st.rerun()
 
-                st.rerun()
+        if game.draw_claim and st.button("🤝 Claim Draw", use_container_width=True):
+            get_analysis_service().cancel(session_id)
+            game.claim_draw()
+            st.rerun()
 
         # Restart button
-        if st.button("Restart Game", use_container_width=True):
-            st.session_state.game = Game()
-            st.session_state.move_history = []
-            st.rerun()
+        st.button("Restart Game", use_container_width=True, on_click=restart_game)
+        with st.form("fen_form"):
+            st.text_input("Start from FEN:", key="fen_input")
+            st.form_submit_button("Load Position", use_container_width=True,
+                                  on_click=load_position)
+        if st.session_state.get("fen_error"):
+            st.error(st.session_state.fen_error)
+
 
+_first_run = True
+instrument.record("startup.imports", time.perf_counter() - _import_started)
 
 if __name__ == "__main__":
     main()
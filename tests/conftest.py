@@ -0,0 +1,25 @@
+import os
+import sys
+import time
+import pytest
+
+# The packages live in src and are run from there, as in the README
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "benchmark: timing run; deselect with -m 'not benchmark'")
+
+
+try:
+    import pytest_benchmark
+except ImportError:
+    @pytest.fixture
+    def benchmark():
+        """Stand-in for pytest-benchmark's fixture: one timed call."""
+        def run(func, *args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            run.seconds = time.perf_counter() - start
+            return result
+        return run
@@ -0,0 +1,41 @@
+import pytest
+from chess.board import Board
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+@pytest.mark.parametrize("fen", [
+    START_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2",
+    "8/8/8/8/8/8/6k1/4K2R b K - 3 40",
+])
+def test_fen_round_trip(fen):
+    assert Board.from_fen(fen).to_fen() == fen
+
+
+def test_snapshot_round_trip():
+    board = Board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    copy = Board.from_snapshot(board.snapshot())
+    assert copy.to_fen() == board.to_fen()
+    assert copy.hash == board.hash
+
+
+@pytest.mark.parametrize("fen, reason", [
+    ("8/8/8/8/8/8/8/8 w - - 0 1", "one king"),
+    ("k7/8/8/8/8/8/8/R6R b - - 0 1", "one king"),
+    ("kk6/8/8/8/8/8/8/K7 w - - 0 1", "one king"),
+    ("kP6/8/8/8/8/8/8/K7 w - - 0 1", "pawn"),
+    ("k7/8/8/8/8/8/8/K6p b - - 0 1", "pawn"),
+    ("k7/8/8/8/8/8/8/R5K1 w - - 0 1", "in check"),
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1", "side to move"),
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq - 0 1", "placement"),
+])
+def test_impossible_fen_rejected(fen, reason):
+    with pytest.raises(ValueError, match=reason):
+        Board.from_fen(fen)
+
+
+def test_side_to_move_may_be_in_check():
+    board = Board.from_fen("k7/8/8/8/8/8/8/R5K1 b - - 0 1")
+    assert board.in_check(1)
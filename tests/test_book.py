@@ -0,0 +1,48 @@
+from chess.board import Board
+from chess.book import ENTRY, OpeningBook, build_book
+from chess.san import move_to_san
+
+PGN = """[Event "a"]
+
+1. e4 e5 2. Nf3 Nc6 *
+
+[Event "b"]
+
+1. e4 c5 2. Nf3 d6 *
+
+[Event "c"]
+
+1. d4 d5 *
+"""
+
+
+def test_build_and_probe(tmp_path):
+    pgn = tmp_path / "games.pgn"
+    pgn.write_text(PGN)
+    path = str(tmp_path / "book.bin")
+    assert build_book(str(pgn), path) == 9
+    book = OpeningBook(path)
+    try:
+        assert book.error is None
+        assert len(book) == 9
+        board = Board()
+        assert [(move_to_san(board, m.move), m.weight) for m in book.moves(board)] == \
+            [("e4", 2), ("d4", 1)]
+        assert book.choose(board) is not None
+    finally:
+        book.close()
+
+
+def test_polyglot_file_is_refused(tmp_path):
+    # Polyglot entries for the start position, with no header
+    path = tmp_path / "polyglot.bin"
+    path.write_bytes(ENTRY.pack(0x463B96181691FC9C, 0x031C, 100, 0) * 2)
+    book = OpeningBook(str(path))
+    assert book.error is not None and "Polyglot" in book.error
+    assert len(book) == 0
+    assert book.moves(Board()) == []
+
+
+def test_missing_file_is_an_empty_book(tmp_path):
+    book = OpeningBook(str(tmp_path / "none.bin"))
+    assert book.error is None and len(book) == 0 and book.choose(Board()) is None
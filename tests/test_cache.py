@@ -0,0 +1,65 @@
+import sys
+import threading
+from chess.cache import PositionEntry, TranspositionCache
+
+
+def test_lru_order_and_eviction():
+    cache = TranspositionCache(capacity=2)
+    cache.put(1, PositionEntry())
+    cache.put(2, PositionEntry())
+    assert cache.get(1) is not None
+    cache.put(3, PositionEntry())
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_concurrent_get_and_put():
+    cache = TranspositionCache(capacity=8)
+    errors = []
+
+    def worker(seed: int) -> None:
+        try:
+            for i in range(20_000):
+                key = (i * seed) % 16
+                if cache.get(key) is None:
+                    cache.put(key, PositionEntry())
+        except Exception as error:
+            errors.append(error)
+
+    interval = sys.getswitchinterval()
+    # Switch threads as often as possible to widen any race window
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in (1, 3, 5, 7)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert len(cache) <= 8
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 4 * 20_000
+
+
+def test_peek_leaves_stats_and_order_alone():
+    cache = TranspositionCache(capacity=2)
+    cache.put(1, PositionEntry())
+    cache.put(2, PositionEntry())
+    assert cache.peek(1) is not None and cache.peek(5) is None
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+    # 1 is still the oldest, so it goes first
+    cache.put(3, PositionEntry())
+    assert cache.peek(1) is None
+
+
+def test_engine_search_does_not_count_a_lookup():
+    from chess.board import Board
+    from chess.cache import position_cache
+    from chess.engine import Engine
+    before = position_cache.stats()
+    Engine().search(Board(), time_limit=0.2, max_depth=2)
+    after = position_cache.stats()
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
@@ -0,0 +1,47 @@
+import pytest
+from chess.board import Board
+from chess.game import Game, PROMOTION_PROMPT
+from chess.movegen import legal_moves
+
+PROMOTION_FEN = "8/P6k/8/8/8/8/8/K7 w - - 0 1"
+
+
+def test_no_moves_while_promotion_pending():
+    game = Game.from_fen(PROMOTION_FEN)
+    assert game.move((1, 0), (0, 0))
+    assert game.promoting == (0, 0)
+    assert list(game.legal_moves()) == []
+    assert game.targets() == {}
+    assert game.result is None
+
+
+def test_move_refused_while_promotion_pending():
+    game = Game.from_fen(PROMOTION_FEN)
+    game.move((1, 0), (0, 0))
+    assert not game.move((7, 0), (6, 0))
+    assert not game.move((1, 7), (2, 7))
+    assert game.status == PROMOTION_PROMPT
+    game.promote("Q")
+    assert game.promoting is None
+    assert game.current_turn == "black"
+    assert game.move((1, 7), (2, 7))
+
+
+def test_movegen_skips_pushes_off_the_board():
+    # A white pawn on the last rank, as between the push and the piece choice
+    board = Board.from_fen(PROMOTION_FEN)
+    board.make_move((1, 0), (0, 0))
+    for color in (0, 1):
+        codes = legal_moves(board.bitboards, color, board.castling, board.en_passant)
+        assert all((code >> 6 & 63) < 64 for code in codes)
+        assert not any(code & 63 == 0 for code in codes)
+
+
+@pytest.mark.parametrize("fen", [
+    "8/8/8/8/8/8/8/8 w - - 0 1",
+    "kP6/8/8/8/8/8/8/K7 w - - 0 1",
+    "k7/8/8/8/8/8/8/R6R b - - 0 1",
+])
+def test_game_from_impossible_fen_raises(fen):
+    with pytest.raises(ValueError, match="Bad FEN"):
+        Game.from_fen(fen)
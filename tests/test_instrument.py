@@ -0,0 +1,13 @@
+from chess import instrument
+
+
+def test_nested_profile_reports_busy():
+    with instrument.Profile() as outer:
+        with instrument.Profile() as inner:
+            sum(range(100))
+    assert inner.report() == instrument.PROFILER_BUSY
+    assert "function calls" in outer.report()
+    # The lock is released, so the next capture runs
+    with instrument.Profile() as again:
+        pass
+    assert not again.busy
@@ -0,0 +1,46 @@
+import pytest
+from chess.board import Board
+from concurrent.futures import ThreadPoolExecutor
+from chess.perft import POSITIONS, START_FEN, analyze_positions, divide, perft
+
+DEPTH = 3
+
+
+@pytest.mark.parametrize("name, fen, counts", POSITIONS, ids=[p[0] for p in POSITIONS])
+def test_reference_counts(name, fen, counts):
+    board = Board.from_fen(fen)
+    for depth in range(1, DEPTH + 1):
+        assert perft(board, depth) == counts[depth - 1]
+
+
+@pytest.mark.parametrize("name", ["start", "endgame"])
+def test_depth_four(name):
+    _, fen, counts = next(p for p in POSITIONS if p[0] == name)
+    assert perft(Board.from_fen(fen), 4) == counts[3]
+
+
+def test_perft_leaves_board_unchanged():
+    board = Board.from_fen(POSITIONS[1][1])
+    before = board.snapshot()
+    perft(board, 3)
+    assert board.snapshot() == before
+
+
+def test_divide_sums_to_perft():
+    board = Board.from_fen(START_FEN)
+    counts = divide(board, 3)
+    assert len(counts) == 20
+    assert sum(counts.values()) == 8902
+
+
+def test_analyze_positions_times_each_position():
+    fens = [START_FEN, POSITIONS[1][1]]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = analyze_positions(fens, 2, executor)
+    assert [r.nodes for r in results] == [400, 2039]
+    assert all(r.seconds > 0 for r in results)
+
+
+@pytest.mark.benchmark
+def test_benchmark_start_depth_four(benchmark):
+    assert benchmark(perft, Board.from_fen(START_FEN), 4) == 197281
@@ -0,0 +1,49 @@
+import json
+import threading
+import pytest
+from ui import render
+
+
+CACHED = (render.font_choices, render.load_font, render.sprite_sheet, render.piece_sprite,
+          render.board_background, render.render_png)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """An empty disk cache, with the in-process caches cleared around the test."""
+    monkeypatch.setattr(render, "CACHE_DIR", str(tmp_path))
+    for cached in CACHED:
+        cached.cache_clear()
+    yield tmp_path
+    for cached in CACHED:
+        cached.cache_clear()
+
+
+def test_fonts_recorded_concurrently(cache_dir):
+    # Different sizes, so each thread resolves and records its own font
+    errors = []
+
+    def resolve(size):
+        try:
+            render.load_font(size, "8")
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=resolve, args=(size,)) for size in range(10, 18)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    if not render.font_choices():
+        pytest.skip("no TrueType font installed")
+    recorded = json.loads((cache_dir / render.FONTS_FILE).read_text())
+    assert recorded == render.font_choices()
+
+
+def test_start_position_reused_from_disk(cache_dir):
+    start = render.STORED_PLACEMENTS.copy().pop()
+    png = render.render_png(start)
+    assert png.startswith(b"\x89PNG")
+    render.render_png.cache_clear()
+    assert render.render_png(start) == png
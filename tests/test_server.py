@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+import pytest
+from server.app import GameServer
+from server.protocol import ProtocolError, Request, read_request
+
+
+def call(server, method, path, body=None):
+    payload = json.dumps(body).encode() if body is not None else b""
+    response = asyncio.run(server.dispatch(Request(method, path, {}, payload)))
+    return response.status, json.loads(response.body) if response.body else {}
+
+
+@pytest.fixture
+def server():
+    server = GameServer()
+    yield server
+    server.close()
+
+
+def test_create_and_move(server):
+    status, state = call(server, "POST", "/games", {"fen": "7k/P7/8/8/8/8/8/K7 w - - 0 1"})
+    assert status == 201
+    status, state = call(server, "POST", f"/games/{state['id']}/moves", {"move": "a7a8q"})
+    assert status == 200
+
+
+def test_create_with_impossible_fen(server):
+    status, body = call(server, "POST", "/games", {"fen": "k7/8/8/8/8/8/8/R6R b - - 0 1"})
+    assert status == 400
+    assert "one king" in body["error"]
+
+
+def test_value_error_is_a_bad_request(server, monkeypatch):
+    def fail(game_id):
+        raise ValueError("bad position")
+    monkeypatch.setattr(server.registry, "get", fail)
+    assert call(server, "GET", "/games/x/moves") == (400, {"error": "bad position"})
+
+
+def test_unexpected_error_is_logged_500(server, monkeypatch, caplog):
+    def fail(game_id):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(server.registry, "get", fail)
+    with caplog.at_level(logging.ERROR, logger="server.app"):
+        status, body = call(server, "GET", "/games/x")
+    assert status == 500
+    assert "boom" not in body["error"]
+    assert "GET /games/x failed" in caplog.text
+
+
+def read(data):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_request(reader)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("length", ["-5", "abc", "+5", "1_0", " "])
+def test_bad_content_length(length):
+    with pytest.raises(ProtocolError) as error:
+        read(f"POST /games HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+    assert error.value.status == 400
+
+
+def test_good_content_length():
+    request = read(b"POST /games HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}")
+    assert request.body == b"{}"
+
+
+def test_negative_length_gets_a_response(server):
+    async def run():
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /games HTTP/1.1\r\nContent-Length: -1\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            writer.close()
+            return head
+    assert asyncio.run(run()).startswith(b"HTTP/1.1 400")
+
+
+def test_claim_draw_route(server):
+    _, state = call(server, "POST", "/games")
+    game = f"/games/{state['id']}"
+    assert call(server, "POST", game + "/draw")[0] == 409
+    for move in ["g1f3", "g8f6", "f3g1", "f6g8"] * 2:
+        status, state = call(server, "POST", game + "/moves", {"move": move})
+        assert status == 200
+    assert state["draw_claim"] == "repetition" and state["result"] is None
+    status, state = call(server, "POST", game + "/draw")
+    assert status == 200 and state["result"] == "repetition"
+
+
+@pytest.mark.parametrize("body, message", [
+    ({"time": float("nan")}, "time"),
+    ({"time": float("inf")}, "time"),
+    ({"time": -1}, "time"),
+    ({"time": 0}, "time"),
+    ({"time": 11}, "time"),
+    ({"depth": 10_000_000}, "depth"),
+    ({"depth": 0}, "depth"),
+    ({"depth": float("nan")}, "depth"),
+    ({"depth": "deep"}, "numbers"),
+])
+def test_engine_limits(server, body, message):
+    _, state = call(server, "POST", "/games")
+    status, reply = call(server, "POST", f"/games/{state['id']}/engine", body)
+    assert status == 400
+    assert message in reply["error"]
+    # Rejected before any search was queued
+    assert server.analysis is None
+
+
+def test_engine_queue_full(server):
+    from chess.analysis import AnalysisService
+    server.analysis = AnalysisService(workers=1, max_pending=0)
+    _, state = call(server, "POST", "/games")
+    status, reply = call(server, "POST", f"/games/{state['id']}/engine", {"time": 0.1})
+    assert status == 503
+    assert server.analysis.rejected == 1
@@ -0,0 +1,109 @@
+from chess import termination
+from chess.board import Board
+from chess.game import CLAIM_MESSAGES, Game
+from chess.pgn import parse_game, replay
+from chess.termination import (FIFTY_MOVES, FIVEFOLD_REPETITION, INSUFFICIENT_MATERIAL,
+                               REPETITION, SEVENTY_FIVE_MOVES, repetition_key)
+
+SHUFFLE = ["Nf3", "Nf6", "Ng1", "Ng8"]
+
+
+def play(game, sans):
+    for san in sans:
+        assert game.move_san(san), (san, game.status)
+
+
+def test_threefold_is_claimable_not_automatic():
+    game = Game()
+    play(game, SHUFFLE * 2)
+    assert game.result is None
+    assert game.draw_claim == REPETITION
+    assert game.status == CLAIM_MESSAGES[REPETITION]
+    # Play goes on unless someone claims
+    play(game, ["e4", "e5"])
+    assert game.draw_claim is None
+
+
+def test_claim_ends_the_game_and_undo_reopens_it():
+    game = Game()
+    play(game, SHUFFLE * 2)
+    assert game.claim_draw()
+    assert game.result == REPETITION
+    assert list(game.legal_moves()) == []
+    assert not game.move_san("e4")
+    restored = Game.restore(game.save())
+    assert restored.result == REPETITION
+    game.undo()
+    assert game.result is None and game.draw_claim is None
+
+
+def test_claim_refused_without_a_draw():
+    game = Game()
+    assert not game.claim_draw()
+    assert game.result is None
+
+
+def test_fivefold_ends_the_game():
+    game = Game()
+    play(game, SHUFFLE * 4)
+    assert game.result == FIVEFOLD_REPETITION
+    assert not game.move_san("e4")
+
+
+def test_move_count_rules():
+    game = Game.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 100 80")
+    assert game.result is None and game.draw_claim == FIFTY_MOVES
+    assert game.move_san("Ra2")
+    game = Game.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 150 100")
+    assert game.result == SEVENTY_FIVE_MOVES
+
+
+def test_insufficient_material_is_automatic():
+    assert Game.from_fen("4k3/8/8/8/8/8/8/3NK3 w - - 0 1").result == INSUFFICIENT_MATERIAL
+
+
+def test_pgn_replay_past_repetition():
+    pgn = parse_game("1. Nf3 Nf6 2. Ng1 Ng8 3. Nf3 Nf6 4. Ng1 Ng8 5. e4 e5 *")
+    assert replay(pgn) == (10, None)
+
+
+def test_en_passant_file_only_counts_when_capturable():
+    board = Board()
+    board.make_move((6, 4), (4, 4))
+    assert board.en_passant is not None
+    same = Board.from_fen("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+    assert repetition_key(board) == same.hash
+
+    # A black pawn on d4 can take e3 en passant
+    board = Board.from_fen("4k3/8/8/8/3p4/8/4P3/4K3 w - - 0 1")
+    board.make_move((6, 4), (4, 4))
+    plain = Board.from_fen("4k3/8/8/8/3pP3/8/8/4K3 b - - 0 1")
+    assert repetition_key(board) != plain.hash
+
+    # Taking en passant would expose the white king to the rook
+    board = Board.from_fen("4k3/2p5/8/KP5r/8/8/8/8 b - - 0 1")
+    board.make_move((1, 2), (3, 2))
+    plain = Board.from_fen("4k3/8/8/KPp4r/8/8/8/8 w - - 0 2")
+    assert repetition_key(board) == plain.hash
+
+
+def test_repetition_counts_a_double_push_without_capture():
+    game = Game()
+    # The position after 1. e4 comes back after 3. Ng1 and 5. Ng1
+    play(game, ["e4", "Nf6", "Nf3", "Ng8", "Ng1", "Nf6", "Nf3", "Ng8"])
+    assert game.draw_claim is None
+    play(game, ["Ng1"])
+    assert game.draw_claim == REPETITION
+
+
+def test_status_reads_keys_pushed_per_ply(monkeypatch):
+    game = Game()
+    play(game, SHUFFLE * 2)
+    assert len(game.tracker.keys) == len(game.history) + 1
+    assert game.draw_claim == REPETITION
+    # Status queries and undo use the stored keys, never a new one
+    monkeypatch.setattr(termination, "repetition_key", None)
+    assert game.result is None
+    assert game.undo()
+    assert game.draw_claim is None
+    assert len(game.tracker.keys) == len(game.history) + 1